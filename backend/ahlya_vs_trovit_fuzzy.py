@@ -1,8 +1,9 @@
-import re
 from pathlib import Path
 
 import pandas as pd
-from rapidfuzz import process, fuzz
+
+from app.services.fuzzy_matcher import join_context, match_frames
+from app.services.normalization import normalize_names
 
 # -------- CONFIG --------
 
@@ -13,6 +14,12 @@ CSV_TROVIT = Path("trovit_charikat_ahliya_all.csv")
 COL_NAME_AHLYA = "اسم_الشركة"
 COL_NAME_TROVIT = "name"
 
+# Blocage : on ne compare que les sociétés d'une même wilaya (None pour désactiver).
+# Les lignes sans candidat >= MAYBE_THRESHOLD dans leur wilaya sont recherchées
+# dans tout Trovit (repli), pour ne pas rater une wilaya mal saisie.
+COL_WILAYA_AHLYA = "الولاية"
+COL_WILAYA_TROVIT = "wilaya"
+
 # Seuils de décision
 # score >= MATCH_THRESHOLD       => match strict
 # MAYBE_THRESHOLD <= score < MATCH_THRESHOLD => à vérifier
@@ -31,33 +38,6 @@ ENCODING = "utf-8-sig"
 # ------------------------
 
 
-def normalize_name(s: str) -> str:
-    """Normalisation agressive pour comparer des noms arabes proches."""
-    if pd.isna(s):
-        return ""
-    s = str(s).strip()
-
-    # Unifier quelques lettres arabes fréquentes
-    s = s.replace("أ", "ا").replace("إ", "ا").replace("آ", "ا")
-    s = s.replace("ى", "ي").replace("ئ", "ي").replace("ؤ", "و")
-    s = s.replace("ة", "ه")
-
-    # Supprimer mots génériques
-    generic = [
-        "شركة", "الشركة",
-        "الاهلية", "الأهلية", "الاهليه",
-        "المحلية", "المحليه",
-        "الجهوية", "الجهويه",
-    ]
-    for g in generic:
-        s = s.replace(g, "")
-
-    # Supprimer ponctuation simple et normaliser les espaces
-    s = re.sub(r"[^\w\s]", " ", s)
-    s = " ".join(s.split())
-    return s
-
-
 def main():
     if not CSV_AHLYA.exists():
         raise FileNotFoundError(CSV_AHLYA.resolve())
@@ -80,51 +60,25 @@ def main():
         )
 
     # 2. Créer des versions normalisées des noms
-    df_ahlya["__name_norm__"] = df_ahlya[COL_NAME_AHLYA].apply(normalize_name)
-    df_trovit["__name_norm__"] = df_trovit[COL_NAME_TROVIT].apply(normalize_name)
-
-    # Liste des noms trovit pour RapidFuzz
-    trovit_names = df_trovit["__name_norm__"].tolist()
-
-    best_scores = []
-    best_indexes = []
+    # (lettres arabes unifiées, mots génériques supprimés : app/services/normalization.py)
+    df_ahlya["__name_norm__"] = normalize_names(df_ahlya[COL_NAME_AHLYA], strip_generic=True)
+    df_trovit["__name_norm__"] = normalize_names(df_trovit[COL_NAME_TROVIT], strip_generic=True)
 
     # 3. Pour chaque société Ahlya, chercher le meilleur match dans Trovit
-    for _, row in df_ahlya.iterrows():
-        name_a = row["__name_norm__"]
-
-        if not name_a:
-            best_scores.append(0)
-            best_indexes.append(None)
-            continue
-
-        match = process.extractOne(
-            name_a,
-            trovit_names,
-            scorer=fuzz.token_sort_ratio,
-        )
-
-        if match is None:
-            best_scores.append(0)
-            best_indexes.append(None)
-        else:
-            _, score, idx = match
-            best_scores.append(score)
-            best_indexes.append(idx)
-
-    df_ahlya["match_score"] = best_scores
-    df_ahlya["trovit_index"] = best_indexes
+    # (cdist RapidFuzz par bloc de wilaya, sur tous les cœurs)
+    df_ahlya = match_frames(
+        df_ahlya,
+        df_trovit,
+        "__name_norm__",
+        "__name_norm__",
+        normalize=lambda names: names,
+        block_a=COL_WILAYA_AHLYA,
+        block_b=COL_WILAYA_TROVIT,
+        fallback_below=MAYBE_THRESHOLD,
+    ).rename(columns={"b_index": "trovit_index"})
     df_ahlya["has_candidate"] = df_ahlya["trovit_index"].notna()
 
     # 4. Ajouter quelques colonnes Trovit pour contexte (nom, wilaya, delegation, ids…)
-    def extract_from_trovit(idx, col):
-        if pd.isna(idx):
-            return None
-        idx = int(idx)
-        if 0 <= idx < len(df_trovit):
-            return df_trovit.iloc[idx].get(col)
-        return None
-
     trovit_cols_to_add = [
         COL_NAME_TROVIT,
         "charika_id",
@@ -135,15 +89,11 @@ def main():
         "legal_form",
         "detail_url",
     ]
-
-    for col in trovit_cols_to_add:
-        new_col = f"trovit_{col}"
-        if col in df_trovit.columns:
-            df_ahlya[new_col] = df_ahlya["trovit_index"].apply(
-                lambda i: extract_from_trovit(i, col)
-            )
-        else:
-            df_ahlya[new_col] = None
+    trovit_index = df_ahlya["trovit_index"].fillna(-1).astype(int)
+    df_ahlya = pd.concat(
+        [df_ahlya, join_context(df_ahlya, df_trovit, trovit_index, trovit_cols_to_add, prefix="trovit_")],
+        axis=1,
+    )
 
     # 5. Marquer les catégories
     df_ahlya["matched_strict"] = df_ahlya["match_score"] >= MATCH_THRESHOLD
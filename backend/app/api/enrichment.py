@@ -1,15 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+import json
 import uuid
+import zlib
 
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models.enrichment_models import (
     EnrichedCompany as EnrichedCompanyDB,
     InvestigationNote as InvestigationNoteDB
 )
+from app.services.normalization import normalize_name
 
 router = APIRouter()
 
@@ -169,6 +174,110 @@ def db_company_to_dict(company: EnrichedCompanyDB) -> dict:
     }
 
 
+LIST_COLUMNS = (
+    EnrichedCompanyDB.company_id,
+    EnrichedCompanyDB.company_name,
+    EnrichedCompanyDB.wilaya,
+    EnrichedCompanyDB.metrics,
+    EnrichedCompanyDB.red_flag_count,
+    EnrichedCompanyDB.has_red_flags,
+    EnrichedCompanyDB.enriched_by,
+    EnrichedCompanyDB.enriched_at,
+    func.json_extract(EnrichedCompanyDB.data, "$.rne.capital_social").label("capital_social"),
+    func.coalesce(func.json_array_length(EnrichedCompanyDB.data, "$.marches.contracts"), 0).label("contracts_count"),
+    func.coalesce(func.json_array_length(EnrichedCompanyDB.data, "$.jort.announcements"), 0).label("jort_count"),
+)
+
+
+def list_row_to_dict(row) -> dict:
+    """List item: db_company_to_dict without `data`, plus the summary counts shown on cards."""
+    return {
+        "company_id": row.company_id,
+        "company_name": row.company_name,
+        "wilaya": row.wilaya,
+        "metrics": row.metrics,
+        "red_flag_count": row.red_flag_count,
+        "has_red_flags": row.has_red_flags,
+        "capital_social": row.capital_social or 0,
+        "contracts_count": row.contracts_count,
+        "jort_count": row.jort_count,
+        "enriched_by": row.enriched_by,
+        "enriched_at": row.enriched_at.isoformat() if row.enriched_at else None,
+    }
+
+
+NAME_MATCH_MODES = Literal["contains", "prefix", "exact"]
+
+
+def name_filter(column, q: str, match: str = "contains"):
+    """
+    Filter on a stored normalized-name column. Exact and prefix lookups are
+    range conditions on its index; contains still scans, but on folded names.
+    """
+    key = normalize_name(q)
+    if match == "exact":
+        return column == key
+    if match == "prefix":
+        return column.between(key, key + "\U0010ffff")
+    return column.contains(key, autoescape=True)
+
+
+EXPORT_COLUMNS = {
+    "company_id": EnrichedCompanyDB.company_id,
+    "company_name": EnrichedCompanyDB.company_name,
+    "wilaya": EnrichedCompanyDB.wilaya,
+    "data": EnrichedCompanyDB.data,
+    "metrics": EnrichedCompanyDB.metrics,
+    "enriched_by": EnrichedCompanyDB.enriched_by,
+    "enriched_at": EnrichedCompanyDB.enriched_at,
+}
+EXPORT_BATCH_SIZE = 500
+
+
+def _export_chunks(fields: List[str], ndjson: bool):
+    """Serialize the projected rows batch by batch from a server-side cursor."""
+    # The request-scoped session may be closed before a streamed body is consumed,
+    # so the generator owns its session
+    db = SessionLocal()
+    try:
+        rows = db.query(*[EXPORT_COLUMNS[f] for f in fields]).order_by(
+            EnrichedCompanyDB.enriched_at.desc()
+        ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+        if not ndjson:
+            yield "["
+        buffer = []
+        first = True
+        for row in rows:
+            item = dict(zip(fields, row))
+            if item.get("enriched_at") is not None:
+                item["enriched_at"] = item["enriched_at"].isoformat()
+            line = json.dumps(item, ensure_ascii=False)
+            if ndjson:
+                buffer.append(line + "\n")
+            else:
+                buffer.append(line if first else "," + line)
+            first = False
+            if len(buffer) >= EXPORT_BATCH_SIZE:
+                yield "".join(buffer)
+                buffer = []
+        if buffer:
+            yield "".join(buffer)
+        if not ndjson:
+            yield "]"
+    finally:
+        db.close()
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)  # 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
 def db_note_to_dict(note: InvestigationNoteDB) -> dict:
     """Convert SQLAlchemy note model to dict matching the frontend-expected shape."""
     return {
@@ -261,20 +370,44 @@ def check_enrichment_status(company_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/all")
-def get_all_enriched(db: Session = Depends(get_db)):
-    """Get all enriched companies (without pagination)."""
-    companies = db.query(EnrichedCompanyDB).order_by(
-        EnrichedCompanyDB.enriched_at.desc()
-    ).all()
-    
-    return [db_company_to_dict(c) for c in companies]
+def get_all_enriched(
+    format: Literal["json", "ndjson"] = "json",
+    fields: Optional[str] = None,
+    gzip: bool = False,
+):
+    """
+    Export all enriched companies, newest first (without pagination).
+
+    The export is streamed from a server-side cursor, so memory stays flat
+    whatever the table size: `json` yields one JSON array chunk by chunk,
+    `ndjson` one object per line. `fields` is a comma-separated projection
+    (e.g. `company_id,wilaya,metrics`) and `gzip=true` compresses the stream.
+    """
+    selected = list(EXPORT_COLUMNS)
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in EXPORT_COLUMNS]
+        if unknown or not selected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields {unknown}, expected a subset of {list(EXPORT_COLUMNS)}"
+            )
+
+    chunks = _export_chunks(selected, ndjson=format == "ndjson")
+    headers = {"Content-Disposition": f'attachment; filename="enriched_companies.{format}"'}
+    if gzip:
+        chunks = _gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
 
 
 @router.get("/list")
 def list_enriched_companies(
-    page: int = 1,
-    per_page: int = 12,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(12, ge=1, le=200),
     search: Optional[str] = None,
+    match: NAME_MATCH_MODES = "contains",
     wilaya: Optional[str] = None,
     has_red_flags: Optional[bool] = None,
     db: Session = Depends(get_db)
@@ -282,41 +415,28 @@ def list_enriched_companies(
     """List all enriched companies with filters and pagination."""
     query = db.query(EnrichedCompanyDB)
     
-    # Filter by search (company name)
+    # Filter by search (company name, on the indexed normalized form)
     if search:
-        query = query.filter(EnrichedCompanyDB.company_name.ilike(f"%{search}%"))
+        query = query.filter(name_filter(EnrichedCompanyDB.name_normalized, search, match))
     
     # Filter by wilaya
     if wilaya:
         query = query.filter(EnrichedCompanyDB.wilaya == wilaya)
-    
-    # Get all matching companies for counting and red flag filtering
-    # (SQLite JSON filtering is limited, so we filter in Python for has_red_flags)
-    all_companies = query.order_by(EnrichedCompanyDB.enriched_at.desc()).all()
-    
-    # Convert to dicts and apply red flag filter if needed
-    companies_dicts = [db_company_to_dict(c) for c in all_companies]
-    
+
+    # Filter on the indexed column kept in sync with metrics.red_flags
     if has_red_flags is not None:
-        if has_red_flags:
-            companies_dicts = [
-                c for c in companies_dicts 
-                if c.get('metrics', {}).get('red_flags')
-            ]
-        else:
-            companies_dicts = [
-                c for c in companies_dicts 
-                if not c.get('metrics', {}).get('red_flags')
-            ]
-    
-    # Pagination
-    total = len(companies_dicts)
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated = companies_dicts[start:end]
+        query = query.filter(EnrichedCompanyDB.has_red_flags == has_red_flags)
+
+    total = query.order_by(None).count()
+
+    # Light projection: the card summary is extracted from `data` by SQLite (JSON1)
+    # instead of loading and deserializing the whole blob for every row
+    rows = query.with_entities(*LIST_COLUMNS).order_by(
+        EnrichedCompanyDB.enriched_at.desc()
+    ).offset((page - 1) * per_page).limit(per_page).all()
     
     return {
-        "companies": paginated,
+        "companies": [list_row_to_dict(row) for row in rows],
         "total": total,
         "page": page,
         "per_page": per_page,
@@ -478,6 +598,7 @@ def list_watch_companies(
     wilaya: Optional[str] = None,
     etat: Optional[str] = None,
     q: Optional[str] = None,
+    match: NAME_MATCH_MODES = "contains",
     db: Session = Depends(get_db)
 ):
     """List companies in the watchlist with optional filters."""
@@ -492,7 +613,7 @@ def list_watch_companies(
         query = query.filter(WatchCompany.etat_enregistrement == etat)
         
     if q:
-        query = query.filter(WatchCompany.name_ar.ilike(f"%{q}%"))
+        query = query.filter(name_filter(WatchCompany.name_normalized, q, match))
         
     # Default sort: created_at desc
     return query.order_by(WatchCompany.created_at.desc()).all()
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, status
+
+from app.services.data_loader import data_loader, get_dataset
+from app.services.llm_cache import llm_cache
+from app.services.llm_service import llm_service
+from app.services.response_cache import response_cache
+from app.services.user_cache import user_cache
+
+router = APIRouter()
+
+
+def _reload_status() -> dict:
+    dataset = get_dataset()
+    return {
+        **data_loader.reload_status,
+        "data_version": dataset.data_version,
+        "data_modified_at": dataset.data_modified_at.isoformat(),
+        "loaded_at": dataset.loaded_at.isoformat(),
+        "companies": len(dataset.companies_df),
+    }
+
+
+@router.post("/reload", status_code=status.HTTP_202_ACCEPTED)
+def reload_data():
+    """Rebuild the dataset in the background; the current one is served until the swap."""
+    if not data_loader.start_background_reload():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A reload is already running")
+    return _reload_status()
+
+
+@router.get("/reload")
+def reload_status():
+    return _reload_status()
+
+
+@router.get("/stats")
+async def cache_stats():
+    """Counters of the in-process caches and of the pooled Gemini HTTP client."""
+    return {
+        "response_cache": response_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "llm_cache": await llm_cache.stats(),
+        "llm_http": llm_service.http_stats(),
+    }
+
+
+@router.get("/llm-cache")
+async def llm_cache_stats():
+    """Hit rate and tokens saved by the persistent LLM result cache."""
+    return await llm_cache.stats()
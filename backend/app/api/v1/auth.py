@@ -1,9 +1,12 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.user_models import User
 from app.schemas.auth_schemas import Token, UserCreate, UserRead, UserUpdate
 from app.services.auth_service import (
@@ -14,13 +17,16 @@ from app.services.auth_service import (
     get_current_active_user,
     get_current_admin_user
 )
+from app.services.user_cache import user_cache
 
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(User).where(User.email == form_data.username))
+    user = result.scalars().first()
+    # argon2 verification is CPU-bound: keep it off the event loop
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -75,6 +81,7 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get
         
     db.commit()
     db.refresh(db_user)
+    user_cache.invalidate_user(user_id)
     return db_user
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -85,4 +92,5 @@ def delete_user(user_id: int, db: Session = Depends(get_db), current_user: User
     
     db.delete(db_user)
     db.commit()
+    user_cache.invalidate_user(user_id)
     return None
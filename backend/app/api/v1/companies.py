@@ -1,44 +1,70 @@
-from fastapi import APIRouter, Query
-from typing import List, Optional
-from app.services.data_loader import get_companies_df
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Literal, Optional
+from app.services.company_search import InvalidCursor, decode_cursor, encode_cursor
+from app.services.data_loader import get_company_index, get_dataset
 from app.models.schemas import Company, CompanyWithLinks
-from app.services.osint_links import get_company_links
+from app.services.osint_links import generate_links, get_company_links
 
 router = APIRouter()
 
+def _records(frame):
+    """Rows as dicts with NaN/NA turned into None, so optional fields validate."""
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
 @router.get("/", response_model=List[Company])
 def list_companies(
+    response: Response,
     wilaya: Optional[str] = None,
     group: Optional[str] = None,
     type: Optional[str] = None,
     search: Optional[str] = None,
-    limit: int = 50
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    order: Literal["asc", "desc"] = "asc",
 ):
-    df = get_companies_df()
-    if df.empty:
-        return []
-
-    if wilaya:
-        df = df[df['wilaya'] == wilaya]
-    if group:
-        df = df[df['activity_group'] == group]
-    if type:
-        df = df[df['type'] == type]
-    if search:
-        mask = df['name'].str.contains(search, na=False) | df['activity_normalized'].str.contains(search, na=False)
-        df = df[mask]
-        
-    return df.head(limit).to_dict(orient='records')
+    """
+    Filtered, searched and sorted page of companies. The body stays a plain list;
+    paging metadata goes in headers: X-Total-Count (matches before paging) and,
+    when more rows follow, X-Next-Cursor to pass back as `cursor`.
+    """
+    dataset = get_dataset()
+    index = dataset.search_index
+    if sort not in index.sort_keys and index.sort_keys:
+        raise HTTPException(status_code=400, detail=f"Unknown sort key, expected one of {index.sort_keys}")
+
+    after_rank = None
+    if cursor:
+        try:
+            after_rank = decode_cursor(cursor, dataset.data_version, sort, order)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    page = index.search(
+        query=search,
+        filters={"wilaya": wilaya, "activity_group": group, "type": type},
+        sort=sort,
+        descending=order == "desc",
+        offset=offset,
+        limit=limit,
+        after_rank=after_rank,
+    )
+
+    response.headers["X-Total-Count"] = str(page.total)
+    if page.next_rank is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(dataset.data_version, sort, order, page.next_rank)
+
+    return _records(dataset.companies_df.iloc[page.positions])
 
 @router.get("/{company_id}", response_model=CompanyWithLinks)
 def read_company(company_id: int):
-    df = get_companies_df()
-    company = df[df['id'] == company_id]
-    if company.empty:
+    row = get_company_index().get_by_id(company_id)
+    if row is None:
         return {} # Should raise 404
         
-    data = company.iloc[0].to_dict()
-    data['osint_links'] = get_company_links(company_id)
+    data = row.to_dict()
+    data['osint_links'] = generate_links(row['name'], row['wilaya'])
     return data
 
 @router.get("/{company_id}/osint_links")
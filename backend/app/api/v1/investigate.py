@@ -2,20 +2,36 @@
 Ba7ath Investigation Endpoint
 ==============================
 POST /api/v1/investigate/{company_id}
+POST /api/v1/investigate/batch   (NDJSON stream, one line per company)
+GET  /api/v1/investigate/history (stored analyses, paginated)
+GET  /api/v1/investigate/history/{investigation_id}
+
+Also registered as the "investigation" job of the background queue
+(app/services/job_queue.py, endpoints in app/api/v1/jobs.py).
 
 Cross-references Ahlya (CSV), JORT (DB), and RNE (DB) data via Gemini LLM.
+Every analysis is stored in the `investigations` table; it is served again
+instead of a new one while the three sources are unchanged.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
-from sqlalchemy.orm import Session
+import time
+from sqlalchemy import select
 
-from app.database import get_db
+from app.database import AsyncSessionLocal
 from app.models.enrichment_models import EnrichedCompany as EnrichedCompanyDB
-from app.services.llm_service import llm_service
-from app.services.data_loader import get_companies_df
+from app.services.batch_investigation import (
+    BATCH_DEFAULT_CONCURRENCY, BATCH_MAX_COMPANIES, BATCH_MAX_CONCURRENCY, BATCH_MAX_RETRIES, stream_batch,
+)
+from app.services import investigation_history
+from app.services.job_queue import job_queue
+from app.services.llm_cache import analysis_config_hash, input_hash
+from app.services.llm_service import GEMINI_MODEL, GENERATION_CONFIG, SYSTEM_PROMPT, llm_service
+from app.services.data_loader import get_company_index
 from app.services.auth_service import get_current_user
 
 import logging
@@ -44,65 +60,78 @@ class InvestigationResult(BaseModel):
     analysis: LLMAnalysis
     sources_used: List[str] = Field(default_factory=list)
     analyzed_at: str
-    model_used: str = "gemini-1.5-flash"
+    model_used: str = GEMINI_MODEL
+    cached: bool = Field(False, description="Résultat servi depuis le cache LLM")
+    reused: bool = Field(False, description="Analyse précédente réutilisée : sources inchangées")
+    investigation_id: Optional[int] = Field(None, description="Ligne de l'historique (table investigations)")
+    error: Optional[str] = Field(None, description="Cause de l'échec de l'analyse LLM (réponse de secours)")
+
+
+class BatchInvestigationRequest(BaseModel):
+    """Companies to investigate: explicit ids and/or every enriched company of a wilaya."""
+    company_ids: List[str] = Field(default_factory=list)
+    wilaya: Optional[str] = None
+    concurrency: int = Field(BATCH_DEFAULT_CONCURRENCY, ge=1, le=BATCH_MAX_CONCURRENCY)
+    max_retries: int = Field(BATCH_MAX_RETRIES, ge=0, le=8)
+    force_refresh: bool = False
 
 
 # ── Helper: Extract Ahlya data from CSV ──────────────────────────────────
 
 def _get_ahlya_data(company_id: str, company_name: str) -> Optional[dict]:
-    """Find the company in the Ahlya DataFrame by ID or name."""
-    df = get_companies_df()
-    if df is None or df.empty:
+    """Find the company in the Ahlya DataFrame by ID or name (hash-indexed)."""
+    index = get_company_index()
+    if index.df.empty:
         return None
 
-    # Try matching by company_id first (if there's an ID column)
-    if "company_id" in df.columns:
-        match = df[df["company_id"] == company_id]
-        if not match.empty:
-            return match.iloc[0].to_dict()
+    # Try matching by company_id first (if there's an ID column), then by RNE id
+    match = index.get_by_company_id(company_id)
+    if match is None:
+        match = index.get_by_rne_id(company_id)
 
-    # Fallback to name matching
-    name_col = "name" if "name" in df.columns else None
-    if name_col is None:
-        for col in df.columns:
-            if "name" in col.lower() or "اسم" in col:
-                name_col = col
-                break
+    # Fallback to name matching (stripped, upper-cased)
+    if match is None and company_name:
+        match = index.get_by_name(company_name)
 
-    if name_col:
-        # Normalize for fuzzy matching
-        normalized_target = company_name.strip().upper()
-        match = df[df[name_col].astype(str).str.strip().str.upper() == normalized_target]
-        if not match.empty:
-            return match.iloc[0].to_dict()
+    return match.to_dict() if match is not None else None
 
-    return None
 
+# ── Investigation (shared by the single and batch endpoints) ─────────────
 
-# ── Main Endpoint ────────────────────────────────────────────────────────
+def _result_from_history(row, reused: bool = False) -> InvestigationResult:
+    return InvestigationResult(
+        company_id=row.company_id,
+        company_name=row.company_name,
+        wilaya=row.wilaya,
+        analysis=LLMAnalysis(**row.analysis),
+        sources_used=row.sources_used,
+        analyzed_at=row.created_at.isoformat(),
+        model_used=row.model,
+        cached=row.llm_cached,
+        reused=reused,
+        investigation_id=row.id,
+        error=row.error,
+    )
 
-@router.post(
-    "/{company_id}",
-    response_model=InvestigationResult,
-    summary="تحليل المقارنة المتقاطعة عبر الذكاء الاصطناعي"
-)
-async def investigate_company(
-    company_id: str,
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
-):
-    """
-    Cross-reference a company's data from Ahlya (CSV), JORT (DB enrichment),
-    and RNE (DB enrichment) using Gemini 1.5 Flash LLM analysis.
 
-    Returns a structured investigation report in Arabic (MSA).
+async def run_investigation(company_id: str, force_refresh: bool = False, retries: int = 0,
+                            requested_by: str = None) -> InvestigationResult:
+    """
+    Cross-reference one company. Raises HTTPException 404 (unknown company)
+    or 422 (no usable source); LLM failures come back as a Pending analysis
+    with `error` set. Unless `force_refresh`, the last stored analysis is
+    returned when the sources have not changed since.
     """
     logger.info(f"📋 Investigation request for company_id: {company_id}")
 
     # ── 1. Retrieve enriched data from SQLite ────────────────────────────
-    enriched = db.query(EnrichedCompanyDB).filter(
-        EnrichedCompanyDB.company_id == company_id
-    ).first()
+    # Short-lived async session: the connection goes back to the pool before
+    # the (slow) LLM call below instead of being held for the whole request
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(EnrichedCompanyDB).where(EnrichedCompanyDB.company_id == company_id)
+        )
+        enriched = result.scalars().first()
 
     if not enriched:
         raise HTTPException(
@@ -148,16 +177,28 @@ async def investigate_company(
             for k, v in ahlya_payload.items()
         }
 
-    # ── 4. Call LLM Analysis ─────────────────────────────────────────────
+    # ── 4. Reuse the last analysis if inputs, model and prompt are unchanged
+    inputs = input_hash(ahlya_payload, jort_payload, rne_payload)
+    config = analysis_config_hash(GEMINI_MODEL, SYSTEM_PROMPT, GENERATION_CONFIG)
+    if not force_refresh:
+        previous = await investigation_history.find_reusable(company_id, inputs, GEMINI_MODEL, config)
+        if previous is not None:
+            logger.info(f"♻️ Inputs unchanged for '{company_name}', reusing investigation #{previous.id}")
+            return _result_from_history(previous, reused=True)
+
+    # ── 5. Call LLM Analysis ─────────────────────────────────────────────
     logger.info(
         f"🚀 Sending to Gemini: company='{company_name}', "
         f"sources={sources_used}"
     )
 
+    start = time.perf_counter()
     raw_analysis = await llm_service.analyze_cross_check(
         ahlya_data=ahlya_payload,
         jort_data=jort_payload,
         rne_data=rne_payload,
+        force_refresh=force_refresh,
+        retries=retries,
     )
 
     # Parse into Pydantic model (validates schema)
@@ -169,13 +210,133 @@ async def investigate_company(
         summary_ar=raw_analysis.get("summary_ar", ""),
     )
 
-    # ── 5. Build response ────────────────────────────────────────────────
+    analyzed_at = datetime.utcnow()
+    cached = raw_analysis.get("_cache", {}).get("hit", False)
+    # HTTP timings of the Gemini call (none on a cache hit) plus the whole analysis, retries included
+    timings = dict(raw_analysis.get("_timings") or {}, analysis_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    # ── 6. Store it in the history ───────────────────────────────────────
+    investigation_id = None
+    try:
+        row = await investigation_history.record(
+            company_id=company_id,
+            company_name=company_name,
+            wilaya=wilaya,
+            input_hash=inputs,
+            model=GEMINI_MODEL,
+            config_hash=config,
+            analysis=analysis.model_dump(),
+            status=analysis.status,
+            sources_used=sources_used,
+            error=raw_analysis.get("_error"),
+            llm_cached=cached,
+            timings=timings,
+            requested_by=requested_by,
+            created_at=analyzed_at,
+        )
+        investigation_id = row.id
+    except Exception as e:
+        logger.warning(f"⚠️ Investigation history write failed for '{company_name}': {e}")
+
+    # ── 7. Build response ────────────────────────────────────────────────
     return InvestigationResult(
         company_id=company_id,
         company_name=company_name,
         wilaya=wilaya,
         analysis=analysis,
         sources_used=sources_used,
-        analyzed_at=datetime.utcnow().isoformat(),
-        model_used="gemini-1.5-flash",
+        analyzed_at=analyzed_at.isoformat(),
+        model_used=GEMINI_MODEL,
+        cached=cached,
+        investigation_id=investigation_id,
+        error=raw_analysis.get("_error"),
+    )
+
+
+async def _investigation_job(company_id: str, force_refresh: bool = False, requested_by: str = None) -> dict:
+    result = await run_investigation(company_id, force_refresh, BATCH_MAX_RETRIES, requested_by)
+    return result.model_dump()
+
+
+job_queue.register("investigation", _investigation_job)
+
+
+async def _enriched_ids_in_wilaya(wilaya: str) -> List[str]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(EnrichedCompanyDB.company_id)
+            .where(EnrichedCompanyDB.wilaya == wilaya)
+            .order_by(EnrichedCompanyDB.company_id)
+        )
+        return list(result.scalars())
+
+
+# ── Endpoints ────────────────────────────────────────────────────────────
+
+# Declared before "/{company_id}", which would otherwise capture "batch"
+@router.post("/batch", summary="تحليل مجموعة من الشركات دفعة واحدة")
+async def investigate_batch(request: BatchInvestigationRequest, current_user=Depends(get_current_user)):
+    """
+    Investigate many companies through a bounded pool of workers. Gemini
+    calls go through the service-wide token bucket and 429/5xx responses are
+    retried with exponential backoff and jitter.
+
+    Streams NDJSON: a `start` line, one `result` line per company as soon as
+    it finishes (completion order), then a `summary` line.
+    """
+    company_ids = list(dict.fromkeys(request.company_ids))
+    if request.wilaya:
+        company_ids = list(dict.fromkeys(company_ids + await _enriched_ids_in_wilaya(request.wilaya)))
+    if not company_ids:
+        raise HTTPException(status_code=400, detail="company_ids or wilaya is required")
+    if len(company_ids) > BATCH_MAX_COMPANIES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_COMPANIES} companies per batch")
+
+    async def investigate(company_id: str) -> dict:
+        result = await run_investigation(
+            company_id, request.force_refresh, request.max_retries, getattr(current_user, "email", None)
+        )
+        return result.model_dump()
+
+    return StreamingResponse(
+        stream_batch(company_ids, investigate, request.concurrency),
+        media_type="application/x-ndjson",
     )
+
+
+@router.post(
+    "/{company_id}",
+    response_model=InvestigationResult,
+    summary="تحليل المقارنة المتقاطعة عبر الذكاء الاصطناعي"
+)
+async def investigate_company(
+    company_id: str,
+    force_refresh: bool = Query(False, description="Ignorer l'historique et le cache LLM et relancer l'analyse"),
+    current_user=Depends(get_current_user),
+):
+    """
+    Cross-reference a company's data from Ahlya (CSV), JORT (DB enrichment),
+    and RNE (DB enrichment) using Gemini LLM analysis.
+
+    Returns a structured investigation report in Arabic (MSA).
+    """
+    return await run_investigation(company_id, force_refresh, requested_by=getattr(current_user, "email", None))
+
+
+@router.get("/history", summary="سجل التحقيقات")
+async def list_investigations(
+    company_id: Optional[str] = None,
+    status: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=200),
+):
+    """Stored analyses, most recent first; filter by company for its dossier."""
+    return await investigation_history.list_page(company_id, status, page, per_page)
+
+
+@router.get("/history/{investigation_id}", summary="تفاصيل تحقيق محفوظ")
+async def get_investigation(investigation_id: int):
+    row = await investigation_history.get(investigation_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Investigation not found")
+    return investigation_history.as_dict(row)
@@ -0,0 +1,103 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models.investigation_models import InvestigationJob
+from app.services.auth_service import get_current_user
+from app.services.job_queue import job_queue
+
+router = APIRouter()
+
+JOB_STATUSES = Literal["queued", "running", "done", "failed", "cancelled"]
+
+
+class InvestigationJobRequest(BaseModel):
+    company_id: str
+    force_refresh: bool = False
+
+
+def _job_status(job: InvestigationJob) -> dict:
+    """Job as returned by the status endpoints, without its result."""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "company_id": job.company_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.error,
+        "submitted_at": job.submitted_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "submitted_by": job.submitted_by,
+    }
+
+
+async def _get_job_or_404(job_id: str) -> InvestigationJob:
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/investigations", status_code=202)
+async def submit_investigation(request: InvestigationJobRequest, current_user=Depends(get_current_user)):
+    """
+    Queue an investigation and return at once; poll GET /jobs/{id} until its
+    status is `done`, then read GET /jobs/{id}/result.
+    """
+    submitted_by = getattr(current_user, "email", None)
+    job = await job_queue.submit(
+        "investigation",
+        {"company_id": request.company_id, "force_refresh": request.force_refresh, "requested_by": submitted_by},
+        company_id=request.company_id,
+        submitted_by=submitted_by,
+    )
+    return _job_status(job)
+
+
+# Declared before "/{job_id}", which would otherwise capture "stats"
+@router.get("/stats")
+async def get_job_stats():
+    """Queue depth, running jobs and throughput of the background job queue."""
+    return await job_queue.stats()
+
+
+@router.get("")
+async def list_jobs(
+    company_id: Optional[str] = None,
+    status: Optional[JOB_STATUSES] = None,
+    limit: int = Query(50, ge=1, le=200),
+):
+    """Most recently submitted jobs, optionally for one company and/or in one status."""
+    query = select(InvestigationJob).order_by(InvestigationJob.submitted_at.desc()).limit(limit)
+    if company_id:
+        query = query.where(InvestigationJob.company_id == company_id)
+    if status:
+        query = query.where(InvestigationJob.status == status)
+    async with AsyncSessionLocal() as db:
+        jobs: List[InvestigationJob] = list((await db.execute(query)).scalars())
+    return [_job_status(job) for job in jobs]
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    return _job_status(await _get_job_or_404(job_id))
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """The stored InvestigationResult of a finished job; 409 while it is not done."""
+    job = await _get_job_or_404(job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return job.result
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; finished jobs are returned unchanged."""
+    await _get_job_or_404(job_id)
+    return _job_status(await job_queue.cancel(job_id))
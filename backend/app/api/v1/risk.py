@@ -1,14 +1,15 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from typing import List
 from app.services.risk_engine import get_risk_for_wilaya, get_all_risks
+from app.services.response_cache import cached_response
 from app.models.schemas import WilayaRisk
 
 router = APIRouter()
 
 @router.get("/wilayas", response_model=List[WilayaRisk])
-def list_risks():
-    return get_all_risks()
+def list_risks(request: Request):
+    return cached_response(request, get_all_risks, List[WilayaRisk])
 
 @router.get("/wilayas/{name}", response_model=WilayaRisk)
-def read_risk(name: str):
-    return get_risk_for_wilaya(name)
+def read_risk(name: str, request: Request):
+    return cached_response(request, lambda: get_risk_for_wilaya(name), WilayaRisk)
@@ -0,0 +1,26 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services import full_text
+
+router = APIRouter()
+
+
+@router.get("")
+def search(
+    q: str = Query(..., min_length=1),
+    scope: Literal["companies", "watch", "notes"] = "companies",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    Full-text search (FTS5) over enriched companies (name, RNE address,
+    location, legal form, JORT announcements), watched companies or
+    investigation notes (title, content, tags). Hits are ranked by bm25 and carry a snippet with the
+    matched words wrapped in <mark>.
+    """
+    return {"query": q, "scope": scope, **full_text.search(db, scope, q, limit, offset)}
@@ -1,13 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from app.services.aggregation import get_national_stats, get_wilaya_stats
+from app.services.response_cache import cached_response
 from app.models.schemas import NationalStats, WilayaStats
 
 router = APIRouter()
 
 @router.get("/national", response_model=NationalStats)
-def read_national_stats():
-    return get_national_stats()
+def read_national_stats(request: Request):
+    return cached_response(request, get_national_stats, NationalStats)
 
 @router.get("/wilayas/{name}", response_model=WilayaStats)
-def read_wilaya_stats(name: str):
-    return get_wilaya_stats(name)
+def read_wilaya_stats(name: str, request: Request):
+    return cached_response(request, lambda: get_wilaya_stats(name), WilayaStats)
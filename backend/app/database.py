@@ -1,17 +1,100 @@
-from sqlalchemy import create_engine
+"""
+SQLAlchemy engine and sessions for the SQLite database.
+
+The database path is absolute (next to the backend sources by default, or
+BA7ATH_DB_PATH), so scripts and the server share one file whatever their
+working directory. Every pooled connection is tuned on connect:
+- WAL journal: readers keep reading while a writer (e.g. an import) commits,
+- synchronous=NORMAL: durable at checkpoints, no fsync per commit under WAL,
+- busy_timeout: writers wait for the lock instead of failing with
+  "database is locked",
+- page cache, memory-mapped I/O and in-memory temp tables.
+
+The async routes use `async_engine` / `AsyncSessionLocal` (SQLAlchemy
+asyncio over aiosqlite) on the same file with the same pragmas, so their
+queries do not block the event loop.
+"""
+
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-# SQLite database file path (relative to where the server runs)
-SQLALCHEMY_DATABASE_URL = "sqlite:///./ba7ath_enriched.db"
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATABASE_PATH = os.path.abspath(os.getenv("BA7ATH_DB_PATH", os.path.join(BACKEND_DIR, "ba7ath_enriched.db")))
+
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 10000))
+# Negative: size in KiB (64 MiB per connection)
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -65536))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", 5))
+SQLITE_MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", 10))
+
+
+def sqlite_pragmas(journal_mode: str = SQLITE_JOURNAL_MODE, synchronous: str = SQLITE_SYNCHRONOUS,
+                   busy_timeout_ms: int = SQLITE_BUSY_TIMEOUT_MS, cache_size: int = SQLITE_CACHE_SIZE,
+                   mmap_size: int = SQLITE_MMAP_SIZE) -> dict:
+    return {
+        "journal_mode": journal_mode,
+        "synchronous": synchronous,
+        "busy_timeout": busy_timeout_ms,
+        "cache_size": cache_size,
+        "mmap_size": mmap_size,
+        "temp_store": "MEMORY",
+    }
+
+
+def _apply_pragmas(engine, pragmas: dict):
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
 
-# For SQLite with FastAPI, check_same_thread is required
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+
+def create_sqlite_engine(path: str = DATABASE_PATH, pragmas: dict = None, pool_size: int = SQLITE_POOL_SIZE,
+                         max_overflow: int = SQLITE_MAX_OVERFLOW, **kwargs):
+    """Engine on an SQLite file, with `pragmas` (default: sqlite_pragmas()) applied to each new connection."""
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+    engine = create_engine(
+        f"sqlite:///{os.path.abspath(path)}",
+        # Sessions are used from FastAPI's threadpool: connections move between threads
+        connect_args={"check_same_thread": False, "timeout": pragmas.get("busy_timeout", 5000) / 1000},
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        **kwargs,
+    )
+    _apply_pragmas(engine, pragmas)
+    return engine
+
+
+def create_async_sqlite_engine(path: str = DATABASE_PATH, pragmas: dict = None, pool_size: int = SQLITE_POOL_SIZE,
+                               max_overflow: int = SQLITE_MAX_OVERFLOW, **kwargs):
+    """aiosqlite counterpart of create_sqlite_engine."""
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{os.path.abspath(path)}",
+        connect_args={"timeout": pragmas.get("busy_timeout", 5000) / 1000},
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        **kwargs,
+    )
+    _apply_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+
+engine = create_sqlite_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_sqlite_engine()
+# Objects stay readable after commit/close: async code cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -22,3 +105,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Async dependency: one AsyncSession per request."""
+    async with AsyncSessionLocal() as db:
+        yield db
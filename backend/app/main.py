@@ -10,10 +10,14 @@ from starlette.middleware.cors import CORSMiddleware
 from app.api.v1 import stats, companies, risk, meta
 from app.api.v1 import investigate as investigate_api
 from app.services.data_loader import load_data
-from app.database import engine, Base
-from app.models import enrichment_models, user_models
-from app.api.v1 import auth
-from app.services.auth_service import get_current_user
+from app.services.data_watcher import data_watcher
+from app.services.job_queue import job_queue
+from app.services.llm_service import llm_service
+from app.database import async_engine, engine, Base
+from app.migrations import run_migrations
+from app.models import enrichment_models, investigation_models, user_models
+from app.api.v1 import auth, admin, jobs, search
+from app.services.auth_service import get_current_user, get_current_admin_user
 
 app = FastAPI(title="Ba7ath OSINT API", version="1.0.0")
 
@@ -28,6 +32,7 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Total-Count", "X-Next-Cursor"],
 )
 
 
@@ -39,6 +44,18 @@ async def startup_event():
     print("=" * 60)
     load_data()
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    data_watcher.start()
+    await llm_service.start()
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    data_watcher.stop()
+    await job_queue.stop()
+    await llm_service.close()
+    await async_engine.dispose()
 
 
 # ── Routers ───────────────────────────────────────────────────────────
@@ -83,6 +100,24 @@ app.include_router(
     tags=["Investigation"],
     dependencies=[Depends(get_current_user)],
 )
+app.include_router(
+    jobs.router,
+    prefix="/api/v1/jobs",
+    tags=["Jobs"],
+    dependencies=[Depends(get_current_user)],
+)
+app.include_router(
+    search.router,
+    prefix="/api/v1/search",
+    tags=["Search"],
+    dependencies=[Depends(get_current_user)],
+)
+app.include_router(
+    admin.router,
+    prefix="/api/v1/admin",
+    tags=["Admin"],
+    dependencies=[Depends(get_current_admin_user)],
+)
 
 
 @app.get("/")
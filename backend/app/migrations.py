@@ -0,0 +1,142 @@
+"""
+Lightweight schema migrations for the SQLite database.
+
+`Base.metadata.create_all` creates missing tables but never alters existing
+ones. Each step below adds what newer models expect to databases created by
+older versions (columns, indexes) and backfills the new columns. Steps are
+idempotent and run at startup, right after create_all, or standalone with
+`python -m app.migrations`. One-off data corrections are recorded in the
+`migration_markers` table and run once per database.
+"""
+
+from sqlalchemy import text
+
+from app.models.enrichment_models import EnrichedCompany, WatchCompany
+from app.services.full_text import create_fts
+from app.services.normalization import name_skeleton, normalize_name
+
+
+def _columns(conn, table: str) -> set:
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def _add_column(conn, table: str, name: str, ddl: str) -> bool:
+    """Add a column if it is missing; returns True when it was just added."""
+    if name in _columns(conn, table):
+        return False
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+    print(f"Migration: added {table}.{name}")
+    return True
+
+
+def _first_run(conn, step: str) -> bool:
+    """True (and recorded) the first time a one-off data correction runs on this database."""
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS migration_markers (name VARCHAR PRIMARY KEY, applied_at DATETIME)"
+    )
+    if conn.exec_driver_sql("SELECT 1 FROM migration_markers WHERE name = ?", (step,)).first():
+        return False
+    conn.exec_driver_sql("INSERT INTO migration_markers (name, applied_at) VALUES (?, CURRENT_TIMESTAMP)", (step,))
+    return True
+
+
+def _create_indexes(conn, table):
+    """Create the model's missing indexes; those on columns a later step adds are left to it."""
+    existing = _columns(conn, table.name)
+    for index in table.indexes:
+        if all(column.name in existing for column in index.columns):
+            index.create(bind=conn, checkfirst=True)
+
+
+def _enriched_red_flags(conn):
+    added = _add_column(conn, "enriched_companies", "red_flag_count", "INTEGER NOT NULL DEFAULT 0")
+    added |= _add_column(conn, "enriched_companies", "has_red_flags", "BOOLEAN NOT NULL DEFAULT 0")
+    if added:
+        result = conn.execute(text(
+            "UPDATE enriched_companies SET "
+            "red_flag_count = COALESCE(json_array_length(metrics, '$.red_flags'), 0), "
+            "has_red_flags = COALESCE(json_array_length(metrics, '$.red_flags'), 0) > 0"
+        ))
+        print(f"Migration: backfilled red flags on {result.rowcount} enriched companies")
+    _create_indexes(conn, EnrichedCompany.__table__)
+
+
+def _enriched_source_hash(conn):
+    # Left NULL: the Trovit importer fills it on its next run without rewriting unchanged rows
+    _add_column(conn, "enriched_companies", "source_hash", "VARCHAR")
+
+
+def _backfill_name_keys(conn, table: str, key: str, name: str):
+    """Compute name_normalized / name_skeleton in Python for rows that lack them."""
+    rows = conn.execute(text(f"SELECT {key}, {name} FROM {table} WHERE name_normalized IS NULL")).all()
+    if not rows:
+        return
+    conn.execute(
+        text(f"UPDATE {table} SET name_normalized = :normalized, name_skeleton = :skeleton WHERE {key} = :key"),
+        [{"key": k, "normalized": normalize_name(n), "skeleton": name_skeleton(n)} for k, n in rows],
+    )
+    print(f"Migration: backfilled name keys on {len(rows)} rows of {table}")
+
+
+def _job_leases(conn):
+    if not _columns(conn, "investigation_jobs"):
+        # Not created yet (scripts run the migrations without create_all); create_all makes it whole
+        return
+    _add_column(conn, "investigation_jobs", "worker_id", "VARCHAR")
+    _add_column(conn, "investigation_jobs", "lease_expires_at", "DATETIME")
+
+
+def _refresh_legal_form_skeletons(conn, table: str, key: str, name: str):
+    """Skeletons computed before RESPONSABILITE / LIMITEE were generic tokens (one-off)."""
+    rows = conn.execute(text(
+        f"SELECT {key}, {name}, name_skeleton FROM {table} "
+        f"WHERE {name} LIKE '%responsabilit%' OR {name} LIKE '%limit%'"
+    )).all()
+    stale = [{"key": k, "skeleton": name_skeleton(n)} for k, n, skeleton in rows if skeleton != name_skeleton(n)]
+    if stale:
+        conn.execute(text(f"UPDATE {table} SET name_skeleton = :skeleton WHERE {key} = :key"), stale)
+        print(f"Migration: refreshed name skeletons on {len(stale)} rows of {table}")
+
+
+def _investigation_config_hash(conn):
+    # Left NULL on older rows: they are never reused, the next request analyses again
+    if _columns(conn, "investigations"):
+        _add_column(conn, "investigations", "config_hash", "VARCHAR")
+
+
+def _name_keys(conn):
+    refresh_legal_forms = _first_run(conn, "legal_form_skeletons")
+    for table, model, key, name in (
+        ("enriched_companies", EnrichedCompany, "company_id", "company_name"),
+        ("watch_companies", WatchCompany, "id", "name_ar"),
+    ):
+        _add_column(conn, table, "name_normalized", "VARCHAR")
+        _add_column(conn, table, "name_skeleton", "VARCHAR")
+        _backfill_name_keys(conn, table, key, name)
+        if refresh_legal_forms:
+            _refresh_legal_form_skeletons(conn, table, key, name)
+        _create_indexes(conn, model.__table__)
+
+
+MIGRATIONS = [
+    _enriched_red_flags,
+    _enriched_source_hash,
+    _name_keys,
+    _job_leases,
+    _investigation_config_hash,
+    create_fts,
+]
+
+
+def run_migrations(engine):
+    with engine.begin() as conn:
+        for migration in MIGRATIONS:
+            migration(conn)
+
+
+if __name__ == "__main__":
+    # Standalone run (from backend/): python -m app.migrations
+    from app.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
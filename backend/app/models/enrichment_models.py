@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, Float, DateTime, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, String, Float, DateTime, Text, ForeignKey, Index, Integer
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.dialects.sqlite import JSON
 from datetime import datetime
 from app.database import Base
+from app.services.normalization import name_skeleton, normalize_name
 
 
 class EnrichedCompany(Base):
@@ -13,14 +14,25 @@ class EnrichedCompany(Base):
     company_name = Column(String, index=True, nullable=False)
     wilaya = Column(String, index=True, nullable=False)
 
+    # Derived from company_name on write (see app/services/normalization.py)
+    name_normalized = Column(String, index=True, nullable=True)
+    name_skeleton = Column(String, index=True, nullable=True)
+
     # Full raw enrichment data (rne, jort, marches, notes) as JSON
     data = Column(JSON, nullable=False)
 
     # Computed metrics (total_contracts, total_contracts_value, ratio, red_flags) as JSON
     metrics = Column(JSON, nullable=False)
 
+    # Denormalized from metrics.red_flags so lists can filter and count in SQL
+    red_flag_count = Column(Integer, nullable=False, default=0, server_default="0")
+    has_red_flags = Column(Boolean, nullable=False, default=False, server_default="0")
+
+    # sha256 of the last imported Trovit record (name, wilaya, rne): unchanged rows are skipped
+    source_hash = Column(String, nullable=True)
+
     enriched_by = Column(String, nullable=True, default="Journalist")
-    enriched_at = Column(DateTime, default=datetime.utcnow)
+    enriched_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     # Relationship to investigation notes
     notes = relationship(
@@ -29,6 +41,24 @@ class EnrichedCompany(Base):
         cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # Serves /enrichment/list filtered on red flags, newest first
+        Index("ix_enriched_companies_flags_enriched_at", "has_red_flags", "enriched_at"),
+    )
+
+    @validates("company_name")
+    def _sync_name_keys(self, key, company_name):
+        self.name_normalized = normalize_name(company_name)
+        self.name_skeleton = name_skeleton(company_name)
+        return company_name
+
+    @validates("metrics")
+    def _sync_red_flags(self, key, metrics):
+        count = len((metrics or {}).get("red_flags") or [])
+        self.red_flag_count = count
+        self.has_red_flags = count > 0
+        return metrics
+
 
 class WatchCompany(Base):  # Using Base from database.py (SQLAlchemy), NOT Pydantic
     __tablename__ = "watch_companies"
@@ -36,6 +66,10 @@ class WatchCompany(Base):  # Using Base from database.py (SQLAlchemy), NOT Pydan
     id = Column(String, primary_key=True, index=True)
     name_ar = Column(String, index=True, nullable=False)
     wilaya = Column(String, index=True, nullable=True)
+
+    # Derived from name_ar on write (see app/services/normalization.py)
+    name_normalized = Column(String, index=True, nullable=True)
+    name_skeleton = Column(String, index=True, nullable=True)
     delegation = Column(String, nullable=True)
     activity = Column(String, nullable=True)
     type = Column(String, nullable=True)  # jihawiya / mahaliya
@@ -52,6 +86,12 @@ class WatchCompany(Base):  # Using Base from database.py (SQLAlchemy), NOT Pydan
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    @validates("name_ar")
+    def _sync_name_keys(self, key, name_ar):
+        self.name_normalized = normalize_name(name_ar)
+        self.name_skeleton = name_skeleton(name_ar)
+        return name_ar
+
 class InvestigationNote(Base):
     """SQLAlchemy model for investigation notes attached to a company dossier."""
     __tablename__ = "investigation_notes"
@@ -0,0 +1,85 @@
+from sqlalchemy import Boolean, Column, String, DateTime, Integer, Text, Index
+from sqlalchemy.dialects.sqlite import JSON
+from datetime import datetime
+from app.database import Base
+
+
+class LLMCacheEntry(Base):
+    """Cached Gemini cross-check result, addressed by the hash of its inputs."""
+    __tablename__ = "llm_cache"
+
+    key = Column(String, primary_key=True)  # sha256 hex, see app/services/llm_cache.py
+    model = Column(String, nullable=False)
+    result = Column(JSON, nullable=False)
+
+    # Token usage reported by Gemini for the original call
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True, nullable=False)
+    last_used_at = Column(DateTime, index=True, default=datetime.utcnow)
+
+
+class InvestigationJob(Base):
+    """Background job (see app/services/job_queue.py); the row is the queue entry and the stored result."""
+    __tablename__ = "investigation_jobs"
+
+    id = Column(String, primary_key=True)  # UUID as string
+    kind = Column(String, nullable=False, default="investigation")
+    company_id = Column(String, index=True, nullable=True)
+    params = Column(JSON, nullable=False, default=dict)
+
+    # queued -> running -> done | failed | cancelled
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    submitted_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    submitted_by = Column(String, nullable=True)
+
+    # Process running the job and the end of its lease, renewed while it runs;
+    # a running job whose lease has expired is queued again
+    worker_id = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_investigation_jobs_status_submitted_at", "status", "submitted_at"),)
+
+
+class Investigation(Base):
+    """One cross-check analysis of a company (see app/services/investigation_history.py)."""
+    __tablename__ = "investigations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(String, nullable=False)
+    company_name = Column(String, nullable=True)
+    wilaya = Column(String, nullable=True)
+
+    # sha256 of the Ahlya, JORT and RNE payloads sent to the model
+    input_hash = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    # sha256 of the model, system prompt, generation config and prompt template version
+    config_hash = Column(String, nullable=True)
+    analysis = Column(JSON, nullable=False)  # LLMAnalysis
+    status = Column(String, index=True, nullable=False, default="Pending")
+    sources_used = Column(JSON, nullable=False, default=list)
+    error = Column(Text, nullable=True)  # set for fallback analyses, which are never reused
+
+    # Served from llm_cache rather than a new Gemini call
+    llm_cached = Column(Boolean, nullable=False, default=False)
+    timings = Column(JSON, nullable=True)
+
+    requested_by = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Requests answered with this analysis because the inputs had not changed
+    reuse_count = Column(Integer, nullable=False, default=0)
+    last_reused_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_investigations_company_created_at", "company_id", "created_at"),
+        Index("ix_investigations_company_input", "company_id", "input_hash", "model"),
+    )
@@ -1,26 +1,20 @@
-from app.services.data_loader import get_companies_df, get_stats_data
+from app.services.data_loader import get_dataset
 from app.models.schemas import NationalStats, WilayaStats
 
-def _safe_value_counts(df, col, head=None):
-    """Safely get value_counts for a column, returning {} if column doesn't exist."""
-    if col not in df.columns:
-        return {}
-    vc = df[col].dropna().value_counts()
-    if head:
-        vc = vc.head(head)
-    return vc.to_dict()
-
 def get_national_stats():
-    stats = get_stats_data()
-    df = get_companies_df()
+    # One dataset reference per call: a concurrent reload cannot mix versions
+    dataset = get_dataset()
+    stats = dataset.stats_data
+    df = dataset.companies_df
     
     total = stats.get("total", 0)
     wilayas = stats.get("wilayas", {})
     types = stats.get("types", {})
     
     if not df.empty:
-        top_groups = _safe_value_counts(df, 'activity_group')
-        top_activities = _safe_value_counts(df, 'activity_normalized', head=10)
+        partitions = dataset.wilaya_partitions
+        top_groups = partitions.national_value_counts('activity_group')
+        top_activities = partitions.national_value_counts('activity_normalized', head=10)
     else:
         top_groups = {}
         top_activities = {}
@@ -34,14 +28,15 @@ def get_national_stats():
     )
 
 def get_wilaya_stats(wilaya: str):
-    df = get_companies_df()
-    stats = get_stats_data()
+    dataset = get_dataset()
+    df = dataset.companies_df
+    stats = dataset.stats_data
     
     if df.empty:
         return None
         
-    wilaya_df = df[df['wilaya'] == wilaya]
-    count = len(wilaya_df)
+    partitions = dataset.wilaya_partitions
+    count = partitions.size(wilaya)
     
     total = stats.get("total", 1)
     pct = round((count / total) * 100, 1)
@@ -50,10 +45,10 @@ def get_wilaya_stats(wilaya: str):
     sorted_wilayas = sorted(stats.get("wilayas", {}).items(), key=lambda x: x[1], reverse=True)
     rank = next((i for i, (w, c) in enumerate(sorted_wilayas, 1) if w == wilaya), 0)
     
-    if not wilaya_df.empty:
-        top_groups = _safe_value_counts(wilaya_df, 'activity_group')
-        top_activities = _safe_value_counts(wilaya_df, 'activity_normalized', head=10)
-        types = _safe_value_counts(wilaya_df, 'type')
+    if count:
+        top_groups = partitions.value_counts(wilaya, 'activity_group')
+        top_activities = partitions.value_counts(wilaya, 'activity_normalized', head=10)
+        types = partitions.value_counts(wilaya, 'type')
     else:
         top_groups = {}
         top_activities = {}
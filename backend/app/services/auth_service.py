@@ -4,13 +4,14 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 import os
 from dotenv import load_dotenv
 
-from app.database import get_db
+from app.database import AsyncSessionLocal
 from app.models.user_models import User
 from app.schemas.auth_schemas import TokenData
+from app.services.user_cache import user_cache
 
 load_dotenv()
 
@@ -40,12 +41,17 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    # Same token seen recently: skip the JWT decode and the user query
+    user = user_cache.get(token)
+    if user is not None:
+        return user
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -55,9 +61,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == token_data.username).first()
+    # Own short session rather than a request-scoped one: the connection is
+    # released here, not when the (possibly long) request finishes
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.email == token_data.username))
+        user = result.scalars().first()
     if user is None:
         raise credentials_exception
+    user_cache.set(token, user, payload.get("exp"))
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
@@ -0,0 +1,81 @@
+"""
+Batch investigations: a bounded asyncio worker pool streaming NDJSON lines.
+
+`concurrency` workers pull company ids from a queue and run the
+investigation callable; results are yielded in completion order, so a
+client sees each company as soon as it is done. Pacing and retries of the
+Gemini calls themselves are done by LLMAnalysisService (token bucket,
+backoff with jitter). If the client disconnects, the remaining workers are
+cancelled.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from fastapi import HTTPException
+
+BATCH_DEFAULT_CONCURRENCY = int(os.getenv("BATCH_DEFAULT_CONCURRENCY", 4))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 16))
+BATCH_MAX_RETRIES = int(os.getenv("BATCH_MAX_RETRIES", 4))
+BATCH_MAX_COMPANIES = int(os.getenv("BATCH_MAX_COMPANIES", 2000))
+
+
+def _line(payload: dict) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+async def _run_one(investigate, company_id: str) -> dict:
+    start = time.perf_counter()
+    line = {"type": "result", "company_id": company_id}
+    try:
+        result = await investigate(company_id)
+        # A fallback analysis (rate limit, timeout...) is reported as a failure
+        line.update(ok=not result.get("error"), result=result)
+    except HTTPException as e:
+        line.update(ok=False, http_status=e.status_code, error=e.detail)
+    except Exception as e:
+        line.update(ok=False, http_status=500, error=str(e))
+    line["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return line
+
+
+async def stream_batch(company_ids: list, investigate, concurrency: int):
+    """Async generator of NDJSON lines: start, one result per company, summary."""
+    start = time.perf_counter()
+    pending = asyncio.Queue()
+    for company_id in company_ids:
+        pending.put_nowait(company_id)
+    done = asyncio.Queue()
+
+    async def worker():
+        while True:
+            try:
+                company_id = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await done.put(await _run_one(investigate, company_id))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(company_ids)))]
+    succeeded = failed = 0
+    try:
+        yield _line({"type": "start", "total": len(company_ids), "concurrency": len(workers)})
+        for _ in range(len(company_ids)):
+            line = await done.get()
+            if line["ok"]:
+                succeeded += 1
+            else:
+                failed += 1
+            yield _line(line)
+        yield _line({
+            "type": "summary",
+            "total": len(company_ids),
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed_s": round(time.perf_counter() - start, 2),
+        })
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,85 @@
+"""
+In-memory hash index over the merged companies DataFrame.
+
+Built once per DataLoader.load() so that per-request lookups (company pages,
+OSINT links, investigations) resolve in O(1) instead of scanning the frame.
+Each map points a key to the position of its FIRST row, which is what the
+former `df[df[col] == key].iloc[0]` pattern returned.
+"""
+
+import pandas as pd
+
+
+def _name_column(df):
+    """The column holding the company name ('name', or the first name-like column)."""
+    if "name" in df.columns:
+        return "name"
+    for col in df.columns:
+        if "name" in col.lower() or "اسم" in col:
+            return col
+    return None
+
+
+def _first_positions(keys):
+    """Map each non-null key to the position of its first occurrence."""
+    positions = {}
+    for pos, key in enumerate(keys):
+        if pd.isna(key):
+            continue
+        positions.setdefault(key, pos)
+    return positions
+
+
+def upper_name_key(name) -> str:
+    """Lookup key used by investigations: stripped, upper-cased name."""
+    return str(name).strip().upper()
+
+
+class CompanyIndex:
+    """Maps id, normalized name, RNE id and upper-cased name to row positions."""
+
+    def __init__(self, df=None):
+        self.df = df if df is not None else pd.DataFrame()
+        self._by_id = {}
+        self._by_company_id = {}
+        self._by_name_normalized = {}
+        self._by_name_upper = {}
+        self._by_rne_id = {}
+
+        if self.df.empty:
+            return
+
+        if "id" in self.df.columns:
+            self._by_id = _first_positions(self.df["id"].tolist())
+        if "company_id" in self.df.columns:
+            self._by_company_id = _first_positions(self.df["company_id"].astype(str).tolist())
+        if "name_normalized" in self.df.columns:
+            self._by_name_normalized = _first_positions(self.df["name_normalized"].tolist())
+        if "rne_id" in self.df.columns:
+            rne_ids = [None if pd.isna(v) else str(v) for v in self.df["rne_id"].tolist()]
+            self._by_rne_id = _first_positions(rne_ids)
+
+        name_col = _name_column(self.df)
+        if name_col:
+            self._by_name_upper = _first_positions(self.df[name_col].astype(str).str.strip().str.upper().tolist())
+
+    def _row(self, positions: dict, key):
+        pos = positions.get(key)
+        if pos is None:
+            return None
+        return self.df.iloc[pos]
+
+    def get_by_id(self, company_id: int):
+        return self._row(self._by_id, company_id)
+
+    def get_by_company_id(self, company_id: str):
+        return self._row(self._by_company_id, str(company_id))
+
+    def get_by_rne_id(self, rne_id: str):
+        return self._row(self._by_rne_id, str(rne_id))
+
+    def get_by_name_normalized(self, name_normalized: str):
+        return self._row(self._by_name_normalized, name_normalized)
+
+    def get_by_name(self, name: str):
+        return self._row(self._by_name_upper, upper_name_key(name))
@@ -0,0 +1,172 @@
+"""
+Trigram search index and sorted pagination over the merged companies DataFrame.
+
+Built once per dataset load. Names and activities are folded with
+normalize_names (upper-case, no accents / Arabic diacritics, Arabic letters
+folded, single spaces) and every trigram of the folded text points to the rows containing it.
+A query intersects the posting lists of its trigrams and only the surviving
+candidates are checked with a substring test, instead of a `str.contains` scan
+of every row on each keystroke.
+
+Sort orders are precomputed as ranks so that a page is a slice of the filtered
+positions ordered by rank; cursors carry the last rank served (keyset paging),
+tied to the data version they were issued for.
+"""
+
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.services.normalization import normalize_name, normalize_names
+
+NGRAM = 3
+SEARCH_COLUMNS = ("name", "activity_normalized")
+FILTER_COLUMNS = ("wilaya", "activity_group", "type")
+SORT_KEYS = ("id", "name", "wilaya", "activity_group", "rne_capital", "jort_capital", "rne_founding_date")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _ngrams(text: str) -> set:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def encode_cursor(version: str, sort: str, order: str, rank: int) -> str:
+    payload = json.dumps({"v": version, "s": sort, "o": order, "r": rank}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, version: str, sort: str, order: str) -> int:
+    """Rank after which the next page starts; rejects cursors from another dataset or ordering."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        rank = int(payload["r"])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if payload.get("v") != version:
+        raise InvalidCursor("Cursor was issued for a previous version of the data")
+    if payload.get("s") != sort or payload.get("o") != order:
+        raise InvalidCursor("Cursor does not match the requested sort")
+    return rank
+
+
+class SearchPage:
+    """One page of results: row positions in companies_df plus paging metadata."""
+
+    def __init__(self, positions, total: int, next_rank=None):
+        self.positions = positions
+        self.total = total
+        self.next_rank = next_rank
+
+
+class CompanySearchIndex:
+    """Filter postings, trigram postings and precomputed sort ranks for companies_df."""
+
+    def __init__(self, df=None):
+        self.df = df if df is not None else pd.DataFrame()
+        self.size = len(self.df)
+        self._texts = []
+        self._ngrams = {}
+        self._filters = {}
+        self._ranks = {}
+
+        if self.df.empty:
+            return
+
+        folded = [normalize_names(self.df[col]) for col in SEARCH_COLUMNS if col in self.df.columns]
+        # A separator that never occurs in a folded query keeps matches inside one field
+        self._texts = ["\n".join(parts) for parts in zip(*[f.tolist() for f in folded])] if folded else [""] * self.size
+
+        postings = {}
+        for pos, text in enumerate(self._texts):
+            for gram in _ngrams(text):
+                postings.setdefault(gram, []).append(pos)
+        self._ngrams = {gram: np.asarray(p, dtype=np.int64) for gram, p in postings.items()}
+
+        for col in FILTER_COLUMNS:
+            if col in self.df.columns:
+                groups = pd.Series(np.arange(self.size)).groupby(self.df[col].to_numpy(), sort=False)
+                self._filters[col] = {value: idx.to_numpy() for value, idx in groups}
+
+        for key in SORT_KEYS:
+            if key in self.df.columns:
+                values = self.df[key].reset_index(drop=True)
+                self._ranks[(key, False)] = self._rank(values, ascending=True)
+                self._ranks[(key, True)] = self._rank(values, ascending=False)
+
+    def _rank(self, values, ascending: bool):
+        """rank[pos] = place of row `pos` in a stable sort of `values`, missing values last."""
+        order = values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+        rank = np.empty(self.size, dtype=np.int64)
+        rank[order] = np.arange(self.size)
+        return rank
+
+    @property
+    def sort_keys(self) -> list:
+        return [key for key, descending in self._ranks if not descending]
+
+    def _filter_mask(self, filters: dict):
+        mask = np.ones(self.size, dtype=bool)
+        for col, value in filters.items():
+            if value is None:
+                continue
+            selected = np.zeros(self.size, dtype=bool)
+            selected[self._filters.get(col, {}).get(value, [])] = True
+            mask &= selected
+        return mask
+
+    def _search_mask(self, query: str):
+        folded = normalize_name(query)
+        mask = np.zeros(self.size, dtype=bool)
+        if not folded:
+            mask[:] = True
+            return mask
+
+        if len(folded) >= NGRAM:
+            candidates = None
+            for gram in _ngrams(folded):
+                posting = self._ngrams.get(gram)
+                if posting is None:
+                    return mask
+                candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+        else:
+            candidates = range(self.size)
+
+        texts = self._texts
+        hits = [pos for pos in candidates if folded in texts[pos]]
+        mask[hits] = True
+        return mask
+
+    def search(self, query=None, filters=None, sort="id", descending=False,
+               offset=0, limit=50, after_rank=None) -> SearchPage:
+        """Filter, search and return one sorted page (by offset, or after a cursor rank)."""
+        if self.size == 0:
+            return SearchPage(np.empty(0, dtype=np.int64), 0)
+
+        mask = self._filter_mask(filters or {})
+        if query:
+            mask &= self._search_mask(query)
+        positions = np.flatnonzero(mask)
+        total = len(positions)
+
+        rank = self._ranks.get((sort, descending))
+        if rank is None:
+            rank = np.arange(self.size)
+        ranks = rank[positions]
+        order = np.argsort(ranks, kind="stable")
+        positions, ranks = positions[order], ranks[order]
+
+        if after_rank is not None:
+            start = int(np.searchsorted(ranks, after_rank, side="right"))
+        else:
+            start = offset
+        page = positions[start:start + limit]
+        next_rank = None
+        if start + limit < total and len(page):
+            next_rank = int(ranks[start + len(page) - 1])
+        return SearchPage(page, total, next_rank)
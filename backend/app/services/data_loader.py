@@ -1,11 +1,18 @@
 import pandas as pd
+import hashlib
 import json
 import os
-import unicodedata
-import re
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
 from dotenv import load_dotenv
 
+from app.services.company_index import CompanyIndex
+from app.services.company_search import CompanySearchIndex
+from app.services.normalization import normalize_name, normalize_names
+from app.services.snapshot import SnapshotStore
+from app.services.wilaya_partitions import WilayaPartitions
+
 # Load environment variables
 load_dotenv()
 
@@ -22,195 +29,310 @@ PATH_AHLYA_CSV = os.getenv("PATH_AHLYA_CSV", "Ahlya_Total_Feuil1.csv")
 PATH_JORT_CSV = os.getenv("PATH_JORT_CSV", "app/scripts/Base-JORT.csv")
 PATH_RNE_CSV = os.getenv("PATH_RNE_CSV", "trovit_charikat_ahliya_all.csv")
 
+CAPITAL_DIVERGENCE_THRESHOLD = float(os.getenv("CAPITAL_DIVERGENCE_THRESHOLD", 0.05))
+
+# Merged-DataFrame snapshot (see app/services/snapshot.py)
+SNAPSHOT_ENABLED = os.getenv("DATA_SNAPSHOT_ENABLED", "True").lower() == "true"
+SNAPSHOT_DIR = Path(os.getenv("DATA_SNAPSHOT_DIR", BASE_DIR.parent / ".cache" / "snapshots"))
+
+AHLYA_COLUMNS = {
+    "اسم_الشركة": "name",
+    "الولاية": "wilaya",
+    "المعتمدية": "delegation",
+    "المنطقة": "locality",
+    "النوع": "type",
+    "الموضوع / النشاط": "activity_raw",
+    "activité_normalisée": "activity_normalized",
+    "activité_groupe": "activity_group"
+}
+
+# JORT/RNE columns the API schema expects even when a source is missing
+OPTIONAL_SOURCE_COLUMNS = [
+    'jort_capital', 'rne_capital', 'jort_ref', 'jort_date', 'jort_text',
+    'rne_id', 'rne_tax_id', 'rne_rc_number', 'rne_founding_date',
+    'rne_legal_form', 'rne_address', 'rne_detail_url',
+]
+
+def _resolve_path(path):
+    """Resolve a CSV path from the environment relative to the backend directory."""
+    path = Path(path)
+    if not path.is_absolute():
+        path = BASE_DIR.parent / path
+    return path
+
+def _source_paths():
+    """Every file the merged companies DataFrame is derived from."""
+    return {
+        "ahlya": _resolve_path(PATH_AHLYA_CSV),
+        "companies_json": COMPANIES_PATH,
+        "jort": _resolve_path(PATH_JORT_CSV),
+        "rne": _resolve_path(PATH_RNE_CSV),
+    }
+
+def _data_version(fingerprint, stats_data):
+    """Version token and last-modified time of the loaded sources and stats."""
+    stats_json = json.dumps(stats_data, sort_keys=True, ensure_ascii=False)
+    version = hashlib.sha256(f"{fingerprint['key']}:{stats_json}".encode('utf-8')).hexdigest()[:16]
+    mtimes = [f['mtime_ns'] for f in fingerprint['files'].values() if 'mtime_ns' in f]
+    if STATS_PATH.exists():
+        mtimes.append(STATS_PATH.stat().st_mtime_ns)
+    modified_at = datetime.fromtimestamp(max(mtimes) / 1e9, tz=timezone.utc) if mtimes else datetime.now(timezone.utc)
+    return version, modified_at.replace(microsecond=0)
+
 def normalize_company_name(name):
     """
-    Standard logic for the join key:
+    Standard logic for the join key (see app/services/normalization.py):
     - Uppercase
     - Stripped
-    - Without accents
+    - Without accents / Arabic diacritics, Arabic letters folded
     - Without double spaces
     """
-    if not isinstance(name, str):
-        return ""
-    
-    # Uppercase
-    name = name.upper()
-    
-    # Normalize unicode to decompose accents
-    name = unicodedata.normalize('NFKD', name)
-    # Remove accents/diacritics
-    name = "".join([c for c in name if not unicodedata.combining(c)])
-    
-    # Remove double spaces and strip
-    name = re.sub(r'\s+', ' ', name).strip()
-    
-    return name
+    return normalize_name(name)
+
+def normalize_company_names(names):
+    """Batch form of normalize_company_name over a whole Series."""
+    return normalize_names(names)
+
+class Dataset:
+    """
+    Everything derived from one load of the sources: the merged DataFrame, the
+    stats and the structures built from them. A Dataset is never mutated after
+    construction; reloads build a new one and swap it in with one assignment.
+    """
+
+    def __init__(self, companies_df=None, stats_data=None, fingerprint=None):
+        self.companies_df = companies_df if companies_df is not None else pd.DataFrame()
+        self.stats_data = stats_data if stats_data is not None else {}
+        self.company_index = CompanyIndex(self.companies_df)
+        self.search_index = CompanySearchIndex(self.companies_df)
+        self.wilaya_partitions = WilayaPartitions(self.companies_df)
+        self.wilaya_risks = {}
+        if not self.companies_df.empty:
+            # Imported here: risk_engine itself reads from this module
+            from app.services.risk_engine import compute_wilaya_risks
+            self.wilaya_risks = compute_wilaya_risks(self.companies_df)
+        # Token identifying the loaded data, used for HTTP ETags (see response_cache)
+        if fingerprint is not None:
+            self.data_version, self.data_modified_at = _data_version(fingerprint, self.stats_data)
+        else:
+            self.data_version, self.data_modified_at = "empty", datetime.now(timezone.utc)
+        self.loaded_at = datetime.now(timezone.utc)
 
 class DataLoader:
     _instance = None
-    companies_df = None
-    stats_data = None
+    dataset = Dataset()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(DataLoader, cls).__new__(cls)
+            cls._instance._reload_lock = threading.Lock()
+            cls._instance.reload_status = {
+                "state": "idle", "started_at": None, "finished_at": None, "error": None,
+            }
         return cls._instance
 
+    # Read-only views on the current dataset (kept for existing callers)
+    companies_df = property(lambda self: self.dataset.companies_df)
+    stats_data = property(lambda self: self.dataset.stats_data)
+
     def load(self):
-        print(f"Loading data from {DATA_DIR} and CSVs...")
+        """Initial (blocking) load; falls back to an empty dataset on error."""
         try:
-            # 1. Load Stats
-            if not STATS_PATH.exists():
-                 print(f"Warning: Stats file not found at {STATS_PATH}")
-                 self.stats_data = {}
-            else:
-                with open(STATS_PATH, 'r', encoding='utf-8') as f:
-                    self.stats_data = json.load(f)
-            
-            # 2. Load Base Companies (Ahlya)
-            ahlya_path = Path(PATH_AHLYA_CSV)
-            if not ahlya_path.is_absolute():
-                ahlya_path = BASE_DIR.parent / ahlya_path
-            
-            if ahlya_path.exists():
-                print(f"Loading Ahlya CSV from {ahlya_path}")
-                self.companies_df = pd.read_csv(ahlya_path)
-                # Normalize columns
-                self.companies_df.rename(columns={
-                    "اسم_الشركة": "name",
-                    "الولاية": "wilaya",
-                    "المعتمدية": "delegation",
-                    "المنطقة": "locality",
-                    "النوع": "type",
-                    "الموضوع / النشاط": "activity_raw",
-                    "activité_normalisée": "activity_normalized",
-                    "activité_groupe": "activity_group"
-                }, inplace=True)
-                # Ensure critical columns exist even if CSV is missing them
-                if 'activity_normalized' not in self.companies_df.columns:
-                    self.companies_df['activity_normalized'] = self.companies_df.get('activity_raw', pd.Series(dtype=str))
-                if 'activity_group' not in self.companies_df.columns:
-                    # Derive from activity_normalized if available
-                    self.companies_df['activity_group'] = self.companies_df.get('activity_normalized', pd.Series(dtype=str))
-                print(f"  -> Loaded {len(self.companies_df)} companies. Columns: {list(self.companies_df.columns)}")
-
-            elif COMPANIES_PATH.exists():
-                print(f"Loading Ahlya from companies.json as fallback")
-                with open(COMPANIES_PATH, 'r', encoding='utf-8') as f:
-                    companies = json.load(f)
-                    self.companies_df = pd.DataFrame(companies)
-                    self.companies_df.rename(columns={
-                        "اسم_الشركة": "name",
-                        "الولاية": "wilaya",
-                        "المعتمدية": "delegation",
-                        "المنطقة": "locality",
-                        "النوع": "type",
-                        "الموضوع / النشاط": "activity_raw",
-                        "activité_normalisée": "activity_normalized",
-                        "activité_groupe": "activity_group"
-                    }, inplace=True)
-                    if 'activity_normalized' not in self.companies_df.columns:
-                        self.companies_df['activity_normalized'] = self.companies_df.get('activity_raw', pd.Series(dtype=str))
-                    if 'activity_group' not in self.companies_df.columns:
-                        self.companies_df['activity_group'] = self.companies_df.get('activity_normalized', pd.Series(dtype=str))
-
-            else:
-                print("Warning: No Ahlya data found!")
-                self.companies_df = pd.DataFrame()
-
-            if not self.companies_df.empty:
-                # Normalize name for join
-                self.companies_df['name_normalized'] = self.companies_df['name'].apply(normalize_company_name)
-                self.companies_df['id'] = range(1, len(self.companies_df) + 1)
-                
-                # 3. Load JORT Data
-                jort_path = Path(PATH_JORT_CSV)
-                if not jort_path.is_absolute():
-                    jort_path = BASE_DIR.parent / jort_path
-                
-                if jort_path.exists():
-                    print(f"Integrating JORT from {jort_path}")
-                    jort_df = pd.read_csv(jort_path)
-                    if 'Dénomination' in jort_df.columns:
-                        jort_df['name_normalized'] = jort_df['Dénomination'].apply(normalize_company_name)
-                        # Prepare subset for merge
-                        jort_subset = jort_df[['name_normalized', 'Référence JORT', 'Date Annonce', 'Capital (DT)', 'Texte Source Original']].copy()
-                        jort_subset.rename(columns={
-                            'Référence JORT': 'jort_ref',
-                            'Date Annonce': 'jort_date',
-                            'Capital (DT)': 'jort_capital',
-                            'Texte Source Original': 'jort_text'
-                        }, inplace=True)
-                        # Merge
-                        self.companies_df = pd.merge(self.companies_df, jort_subset, on='name_normalized', how='left')
-
-                # 4. Load RNE Data
-                rne_path = Path(PATH_RNE_CSV)
-                if not rne_path.is_absolute():
-                    rne_path = BASE_DIR.parent / rne_path
-                
-                if rne_path.exists():
-                    print(f"Integrating RNE from {rne_path}")
-                    rne_df = pd.read_csv(rne_path)
-                    if 'name' in rne_df.columns:
-                        rne_df['name_normalized'] = rne_df['name'].apply(normalize_company_name)
-                        # Prepare subset
-                        rne_subset = rne_df[['name_normalized', 'charika_id', 'tax_id', 'rc_number', 'founding_date_iso', 'legal_form', 'address', 'detail_url', 'capital']].copy()
-                        rne_subset.rename(columns={
-                            'charika_id': 'rne_id',
-                            'tax_id': 'rne_tax_id',
-                            'rc_number': 'rne_rc_number',
-                            'founding_date_iso': 'rne_founding_date',
-                            'legal_form': 'rne_legal_form',
-                            'address': 'rne_address',
-                            'detail_url': 'rne_detail_url',
-                            'capital': 'rne_capital'
-                        }, inplace=True)
-                        # Merge
-                        self.companies_df = pd.merge(self.companies_df, rne_subset, on='name_normalized', how='left')
-
-                # 5. Capital Divergence Check
-                threshold = float(os.getenv("CAPITAL_DIVERGENCE_THRESHOLD", 0.05))
-                self.companies_df['capital_divergence'] = False
-                
-                # Ensure columns exist before processing
-                if 'jort_capital' in self.companies_df.columns and 'rne_capital' in self.companies_df.columns:
-                    # Ensure capitals are numeric
-                    self.companies_df['jort_capital'] = pd.to_numeric(self.companies_df['jort_capital'], errors='coerce')
-                    self.companies_df['rne_capital'] = pd.to_numeric(self.companies_df['rne_capital'], errors='coerce')
-                    
-                    mask = (self.companies_df['jort_capital'].notna()) & (self.companies_df['rne_capital'].notna()) & (self.companies_df['jort_capital'] > 0)
-                    diff = abs(self.companies_df.loc[mask, 'jort_capital'] - self.companies_df.loc[mask, 'rne_capital']) / self.companies_df.loc[mask, 'jort_capital']
-                    self.companies_df.loc[mask, 'capital_divergence'] = diff > threshold
-                else:
-                    # Create empty columns if they dont exist to stay compliant with schema
-                    if 'jort_capital' not in self.companies_df.columns: self.companies_df['jort_capital'] = pd.NA
-                    if 'rne_capital' not in self.companies_df.columns: self.companies_df['rne_capital'] = pd.NA
-                    if 'jort_ref' not in self.companies_df.columns: self.companies_df['jort_ref'] = pd.NA
-                    if 'jort_date' not in self.companies_df.columns: self.companies_df['jort_date'] = pd.NA
-                    if 'jort_text' not in self.companies_df.columns: self.companies_df['jort_text'] = pd.NA
-                    if 'rne_id' not in self.companies_df.columns: self.companies_df['rne_id'] = pd.NA
-                    if 'rne_tax_id' not in self.companies_df.columns: self.companies_df['rne_tax_id'] = pd.NA
-                    if 'rne_rc_number' not in self.companies_df.columns: self.companies_df['rne_rc_number'] = pd.NA
-                    if 'rne_founding_date' not in self.companies_df.columns: self.companies_df['rne_founding_date'] = pd.NA
-                    if 'rne_legal_form' not in self.companies_df.columns: self.companies_df['rne_legal_form'] = pd.NA
-                    if 'rne_address' not in self.companies_df.columns: self.companies_df['rne_address'] = pd.NA
-                    if 'rne_detail_url' not in self.companies_df.columns: self.companies_df['rne_detail_url'] = pd.NA
-
+            self.dataset = self._build_dataset()
         except Exception as e:
             print(f"Error loading combined data: {e}")
             import traceback
             traceback.print_exc()
-            self.companies_df = pd.DataFrame()
-            self.stats_data = {}
+            self.dataset = Dataset()
+
+    def reload(self) -> bool:
+        """
+        Rebuild the dataset in the calling thread and swap it in atomically.
+        In-flight requests keep the Dataset they already hold; on failure the
+        current dataset stays in place. Returns False if a reload is running.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        self._reload_holding_lock()
+        return True
+
+    def _reload_holding_lock(self):
+        """Body of reload(); the caller has acquired _reload_lock, released here."""
+        try:
+            self.reload_status.update(state="running", started_at=datetime.now(timezone.utc).isoformat(), error=None)
+            dataset = self._build_dataset()
+            self.dataset = dataset
+            self.reload_status.update(state="idle", finished_at=datetime.now(timezone.utc).isoformat())
+            print(f"Dataset reloaded: {len(dataset.companies_df)} companies, version {dataset.data_version}")
+        except Exception as e:
+            print(f"Error reloading data, keeping version {self.dataset.data_version}: {e}")
+            self.reload_status.update(state="failed", finished_at=datetime.now(timezone.utc).isoformat(), error=str(e))
+        finally:
+            self._reload_lock.release()
+
+    def start_background_reload(self) -> bool:
+        """Run reload() in a daemon thread. Returns False if a reload is already running."""
+        # Acquired here and handed to the thread, so two callers cannot both start one
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            threading.Thread(target=self._reload_holding_lock, name="dataset-reload", daemon=True).start()
+        except Exception:
+            self._reload_lock.release()
+            raise
+        return True
+
+    def _build_dataset(self):
+        print(f"Loading data from {DATA_DIR} and CSVs...")
+        # 1. Load Stats
+        if not STATS_PATH.exists():
+             print(f"Warning: Stats file not found at {STATS_PATH}")
+             stats_data = {}
+        else:
+            with open(STATS_PATH, 'r', encoding='utf-8') as f:
+                stats_data = json.load(f)
+
+        # 2. Load merged companies, from the snapshot when sources are unchanged
+        store = SnapshotStore(SNAPSHOT_DIR, enabled=SNAPSHOT_ENABLED)
+        fingerprint = store.fingerprint(_source_paths(), extra={"capital_divergence_threshold": CAPITAL_DIVERGENCE_THRESHOLD})
+        companies_df = store.read(fingerprint)
+        if companies_df is not None:
+            print(f"  -> Loaded {len(companies_df)} companies from snapshot {fingerprint['key'][:16]}")
+        else:
+            companies_df = self._build_companies_df()
+            store.write(companies_df, fingerprint)
+
+        return Dataset(companies_df, stats_data, fingerprint)
+
+    def _build_companies_df(self):
+        """Parse the Ahlya, JORT and RNE sources and merge them into one DataFrame."""
+        # 2. Load Base Companies (Ahlya)
+        ahlya_path = _resolve_path(PATH_AHLYA_CSV)
+
+        if ahlya_path.exists():
+            print(f"Loading Ahlya CSV from {ahlya_path}")
+            companies_df = pd.read_csv(ahlya_path)
+            # Normalize columns
+            companies_df.rename(columns=AHLYA_COLUMNS, inplace=True)
+            # Ensure critical columns exist even if CSV is missing them
+            if 'activity_normalized' not in companies_df.columns:
+                companies_df['activity_normalized'] = companies_df.get('activity_raw', pd.Series(dtype=str))
+            if 'activity_group' not in companies_df.columns:
+                # Derive from activity_normalized if available
+                companies_df['activity_group'] = companies_df.get('activity_normalized', pd.Series(dtype=str))
+            print(f"  -> Loaded {len(companies_df)} companies. Columns: {list(companies_df.columns)}")
+
+        elif COMPANIES_PATH.exists():
+            print(f"Loading Ahlya from companies.json as fallback")
+            with open(COMPANIES_PATH, 'r', encoding='utf-8') as f:
+                companies = json.load(f)
+                companies_df = pd.DataFrame(companies)
+                companies_df.rename(columns=AHLYA_COLUMNS, inplace=True)
+                if 'activity_normalized' not in companies_df.columns:
+                    companies_df['activity_normalized'] = companies_df.get('activity_raw', pd.Series(dtype=str))
+                if 'activity_group' not in companies_df.columns:
+                    companies_df['activity_group'] = companies_df.get('activity_normalized', pd.Series(dtype=str))
+
+        else:
+            print("Warning: No Ahlya data found!")
+            return pd.DataFrame()
+
+        if companies_df.empty:
+            return companies_df
+
+        # Normalize name for join
+        companies_df['name_normalized'] = normalize_company_names(companies_df['name'])
+        companies_df['id'] = range(1, len(companies_df) + 1)
+
+        # 3. Load JORT Data
+        jort_path = _resolve_path(PATH_JORT_CSV)
+
+        if jort_path.exists():
+            print(f"Integrating JORT from {jort_path}")
+            jort_df = pd.read_csv(jort_path)
+            if 'Dénomination' in jort_df.columns:
+                jort_df['name_normalized'] = normalize_company_names(jort_df['Dénomination'])
+                # Prepare subset for merge
+                jort_subset = jort_df[['name_normalized', 'Référence JORT', 'Date Annonce', 'Capital (DT)', 'Texte Source Original']].copy()
+                jort_subset.rename(columns={
+                    'Référence JORT': 'jort_ref',
+                    'Date Annonce': 'jort_date',
+                    'Capital (DT)': 'jort_capital',
+                    'Texte Source Original': 'jort_text'
+                }, inplace=True)
+                # Merge
+                companies_df = pd.merge(companies_df, jort_subset, on='name_normalized', how='left')
+
+        # 4. Load RNE Data
+        rne_path = _resolve_path(PATH_RNE_CSV)
+
+        if rne_path.exists():
+            print(f"Integrating RNE from {rne_path}")
+            rne_df = pd.read_csv(rne_path)
+            if 'name' in rne_df.columns:
+                rne_df['name_normalized'] = normalize_company_names(rne_df['name'])
+                # Prepare subset
+                rne_subset = rne_df[['name_normalized', 'charika_id', 'tax_id', 'rc_number', 'founding_date_iso', 'legal_form', 'address', 'detail_url', 'capital']].copy()
+                rne_subset.rename(columns={
+                    'charika_id': 'rne_id',
+                    'tax_id': 'rne_tax_id',
+                    'rc_number': 'rne_rc_number',
+                    'founding_date_iso': 'rne_founding_date',
+                    'legal_form': 'rne_legal_form',
+                    'address': 'rne_address',
+                    'detail_url': 'rne_detail_url',
+                    'capital': 'rne_capital'
+                }, inplace=True)
+                # Merge
+                companies_df = pd.merge(companies_df, rne_subset, on='name_normalized', how='left')
+
+        # 5. Capital Divergence Check
+        companies_df['capital_divergence'] = False
+
+        # Ensure columns exist before processing
+        if 'jort_capital' in companies_df.columns and 'rne_capital' in companies_df.columns:
+            # Ensure capitals are numeric
+            companies_df['jort_capital'] = pd.to_numeric(companies_df['jort_capital'], errors='coerce')
+            companies_df['rne_capital'] = pd.to_numeric(companies_df['rne_capital'], errors='coerce')
+
+            mask = (companies_df['jort_capital'].notna()) & (companies_df['rne_capital'].notna()) & (companies_df['jort_capital'] > 0)
+            diff = abs(companies_df.loc[mask, 'jort_capital'] - companies_df.loc[mask, 'rne_capital']) / companies_df.loc[mask, 'jort_capital']
+            companies_df.loc[mask, 'capital_divergence'] = diff > CAPITAL_DIVERGENCE_THRESHOLD
+        else:
+            # Create empty columns if they dont exist to stay compliant with schema
+            for col in OPTIONAL_SOURCE_COLUMNS:
+                if col not in companies_df.columns:
+                    companies_df[col] = pd.NA
+
+        return companies_df
 
 data_loader = DataLoader()
 
 def load_data():
     data_loader.load()
 
+def get_dataset():
+    """The current Dataset; hold on to it to read consistent data across calls."""
+    return data_loader.dataset
+
 def get_companies_df():
-    return data_loader.companies_df
+    return data_loader.dataset.companies_df
+
+def get_company_index():
+    return data_loader.dataset.company_index
+
+def get_search_index():
+    return data_loader.dataset.search_index
+
+def get_wilaya_partitions():
+    return data_loader.dataset.wilaya_partitions
+
+def get_wilaya_risks():
+    return data_loader.dataset.wilaya_risks
 
 def get_stats_data():
-    return data_loader.stats_data
+    return data_loader.dataset.stats_data
+
+def get_data_version():
+    dataset = data_loader.dataset
+    return dataset.data_version, dataset.data_modified_at
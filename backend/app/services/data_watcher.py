@@ -0,0 +1,71 @@
+"""
+Polling watcher on the dataset source files (Ahlya, JORT, RNE, stats.json...).
+
+When a file's size or mtime changes and then stays stable for one more poll
+(so a CSV still being copied is not picked up half-written), the watcher asks
+DataLoader for a background reload. Disabled unless DATA_WATCH_INTERVAL > 0.
+"""
+
+import os
+import threading
+from pathlib import Path
+
+from app.services.data_loader import STATS_PATH, _source_paths, data_loader
+
+DATA_WATCH_INTERVAL = float(os.getenv("DATA_WATCH_INTERVAL", 0))
+
+
+def _stat_signature(paths) -> dict:
+    signature = {}
+    for path in paths:
+        try:
+            stat = Path(path).stat()
+            signature[str(path)] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            signature[str(path)] = None
+    return signature
+
+
+class DataWatcher:
+    """Background thread polling the source files every `interval` seconds."""
+
+    def __init__(self, interval: float = DATA_WATCH_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _paths(self) -> list:
+        return list(_source_paths().values()) + [STATS_PATH]
+
+    def _run(self):
+        current = _stat_signature(self._paths())
+        pending = None
+        while not self._stop.wait(self.interval):
+            signature = _stat_signature(self._paths())
+            if signature == current:
+                pending = None
+                continue
+            if signature != pending:
+                # Changed since the last poll: wait until it settles
+                pending = signature
+                continue
+            print("Data sources changed, reloading dataset in background...")
+            if data_loader.start_background_reload():
+                current = signature
+                pending = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="data-watcher", daemon=True)
+        self._thread.start()
+        print(f"Watching data sources every {self.interval}s")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+
+data_watcher = DataWatcher()
@@ -0,0 +1,214 @@
+"""
+SQLite FTS5 full-text indexes over enriched companies, watched companies and
+investigation notes.
+
+Each source table gets an FTS5 table kept in sync by AFTER INSERT / UPDATE /
+DELETE triggers, so every writer (ORM, bulk upserts, scripts, the sqlite3
+shell) updates the index without Python hooks. Index rows carry the source
+primary key in an UNINDEXED `source_key` column, used by the triggers and the
+search joins: the source tables have string primary keys, so their implicit
+rowids are not stable (VACUUM may renumber them).
+
+Arabic-aware folding: the unicode61 tokenizer case-folds and strips Latin
+accents but knows nothing of Arabic, so the triggers store text folded in SQL
+the way normalization.py folds names (harakat and tatweel removed, أ/إ/آ/ٱ → ا,
+ؤ → و, ئ/ى → ي, ة → ه) and queries go through normalize_name. Snippets are
+therefore cut from the folded text.
+
+Every query word is matched as a word prefix, with or without the Arabic
+article ("زيتون" finds "زيتونة" and "الزيتونة"), and all words must match;
+hits are ranked by bm25 with per-column weights, names counting most.
+"""
+
+import re
+
+from sqlalchemy import text
+
+from app.services.normalization import normalize_name
+
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+SNIPPET_TOKENS = 12
+
+_SQL_FOLD = [
+    ("أ", "ا"), ("إ", "ا"), ("آ", "ا"), ("ٱ", "ا"),
+    ("ؤ", "و"), ("ئ", "ي"), ("ى", "ي"), ("ة", "ه"),
+    ("ـ", ""),
+] + [(chr(c), "") for c in range(0x064B, 0x0660)] + [("ٰ", "")]
+
+
+def _words(*exprs) -> str:
+    """SQL concatenation of nullable text expressions."""
+    return " || ' ' || ".join(f"coalesce({e}, '')" for e in exprs)
+
+
+class FtsIndex:
+    """One FTS5 table mirroring some (expression) columns of a source table."""
+
+    def __init__(self, name: str, source: str, key: str, columns: dict, weights: dict, watched: tuple):
+        self.name = name
+        self.source = source
+        # Primary key of the source table, stored in `source_key`
+        self.key = key
+        # column -> SQL expression over the source row, with {row} as its alias
+        self.columns = columns
+        self.weights = weights
+        # Source columns whose update refreshes the index entry
+        self.watched = (key,) + watched
+
+    def _values(self, row: str) -> str:
+        return ", ".join(fold_sql(expr.format(row=row)) for expr in self.columns.values())
+
+    def _insert(self, row: str) -> str:
+        return (f"INSERT INTO {self.name}(source_key, {', '.join(self.columns)}) "
+                f"SELECT {row}.{self.key}, {self._values(row)}")
+
+    def fts_columns(self) -> list:
+        return ["source_key", *self.columns]
+
+    def triggers(self) -> list:
+        return [f"{self.name}_ai", f"{self.name}_ad", f"{self.name}_au"]
+
+    def ddl(self) -> list:
+        cols = ", ".join(self.columns)
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING fts5("
+            f"source_key UNINDEXED, {cols}, tokenize='{FTS_TOKENIZER}', prefix='2 3')",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ai AFTER INSERT ON {self.source} BEGIN "
+            f"{self._insert('new')}; END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_ad AFTER DELETE ON {self.source} BEGIN "
+            f"DELETE FROM {self.name} WHERE source_key = old.{self.key}; END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.name}_au AFTER UPDATE OF {', '.join(self.watched)} ON {self.source} BEGIN "
+            f"DELETE FROM {self.name} WHERE source_key = old.{self.key}; {self._insert('new')}; END",
+        ]
+
+    def rebuild_sql(self) -> list:
+        return [f"DELETE FROM {self.name}", f"{self._insert(self.source)} FROM {self.source}"]
+
+    def bm25(self) -> str:
+        # source_key is unindexed: its weight never applies
+        return f"bm25({self.name}, 0.0, {', '.join(str(self.weights.get(c, 1.0)) for c in self.columns)})"
+
+
+INDEXES = {
+    "companies": FtsIndex(
+        "enriched_companies_fts", "enriched_companies", "company_id",
+        columns={
+            "name": "{row}.company_name",
+            "address": "json_extract({row}.data, '$.rne.address')",
+            "location": _words("{row}.wilaya", "json_extract({row}.data, '$.rne.delegation')",
+                               "json_extract({row}.data, '$.rne.founding_location')"),
+            "legal_form": "json_extract({row}.data, '$.rne.legal_form')",
+            # JORT announcement texts (object of the company, shareholders, ...)
+            "jort": "(SELECT group_concat(json_extract(value, '$.content'), ' ') "
+                    "FROM json_each({row}.data, '$.jort.announcements'))",
+        },
+        weights={"name": 10.0, "address": 2.0},
+        watched=("company_name", "wilaya", "data"),
+    ),
+    "watch": FtsIndex(
+        "watch_companies_fts", "watch_companies", "id",
+        columns={
+            "name": "{row}.name_ar",
+            "location": _words("{row}.wilaya", "{row}.delegation"),
+            "activity": "{row}.activity",
+        },
+        weights={"name": 10.0, "activity": 3.0},
+        watched=("name_ar", "wilaya", "delegation", "activity"),
+    ),
+    "notes": FtsIndex(
+        "investigation_notes_fts", "investigation_notes", "id",
+        columns={
+            "title": "{row}.title",
+            "content": "{row}.content",
+            "tags": "(SELECT group_concat(value, ' ') FROM json_each({row}.tags))",
+        },
+        weights={"title": 5.0, "tags": 3.0},
+        watched=("title", "content", "tags"),
+    ),
+}
+
+
+def fold_sql(expr: str) -> str:
+    """SQL expression folding Arabic letters of `expr` like normalize_name."""
+    for old, new in _SQL_FOLD:
+        expr = f"replace({expr}, '{old}', '{new}')"
+    return expr
+
+
+def _word_variants(word: str) -> list:
+    if word.startswith("ال") and len(word) > 3:
+        return [word, word[2:]]
+    if re.match(r"[\u0600-\u06FF]", word):
+        return [word, "ال" + word]
+    return [word]
+
+
+def match_expression(q: str):
+    """FTS5 MATCH string for a user query: each word as a quoted prefix ('' -> None)."""
+    words = re.findall(r"\w+", normalize_name(q))
+    if not words:
+        return None
+    return " AND ".join("(" + " OR ".join(f'"{v}"*' for v in _word_variants(w)) + ")" for w in words)
+
+
+def create_fts(conn):
+    """
+    Create the FTS tables and triggers that are missing; fill the new tables.
+    An FTS table whose columns differ from its definition is dropped and built
+    again.
+    """
+    existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for index in INDEXES.values():
+        if index.source not in existing:
+            continue
+        if index.name in existing:
+            columns = [row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({index.name})")]
+            if columns != index.fts_columns():
+                for trigger in index.triggers():
+                    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+                conn.exec_driver_sql(f"DROP TABLE {index.name}")
+                existing.discard(index.name)
+        for statement in index.ddl():
+            conn.exec_driver_sql(statement)
+        if index.name not in existing:
+            rebuild_fts(conn, index)
+            print(f"Migration: built full-text index {index.name}")
+
+
+def rebuild_fts(conn, index: FtsIndex):
+    for statement in index.rebuild_sql():
+        conn.exec_driver_sql(statement)
+
+
+_SEARCH_SQL = {
+    "companies": (
+        "SELECT s.company_id, s.company_name, s.wilaya, s.enriched_at, {snippet} AS snippet, {rank} AS score "
+        "FROM enriched_companies_fts JOIN enriched_companies s ON s.company_id = enriched_companies_fts.source_key "
+        "WHERE enriched_companies_fts MATCH :match ORDER BY score LIMIT :limit OFFSET :offset"
+    ),
+    "watch": (
+        "SELECT s.id, s.name_ar, s.wilaya, s.etat_enregistrement, {snippet} AS snippet, {rank} AS score "
+        "FROM watch_companies_fts JOIN watch_companies s ON s.id = watch_companies_fts.source_key "
+        "WHERE watch_companies_fts MATCH :match ORDER BY score LIMIT :limit OFFSET :offset"
+    ),
+    "notes": (
+        "SELECT s.id, s.company_id, s.title, s.created_at, {snippet} AS snippet, {rank} AS score "
+        "FROM investigation_notes_fts JOIN investigation_notes s ON s.id = investigation_notes_fts.source_key "
+        "WHERE investigation_notes_fts MATCH :match ORDER BY score LIMIT :limit OFFSET :offset"
+    ),
+}
+
+
+def search(db, scope: str, q: str, limit: int = 20, offset: int = 0, mark: tuple = ("<mark>", "</mark>")) -> dict:
+    """Ranked hits (best first) of one index, with a highlighted snippet of the best column."""
+    match = match_expression(q)
+    if match is None:
+        return {"total": 0, "items": []}
+    index = INDEXES[scope]
+    snippet = f"snippet({index.name}, -1, :open, :close, '…', {SNIPPET_TOKENS})"
+    sql = _SEARCH_SQL[scope].format(snippet=snippet, rank=index.bm25())
+    total = db.execute(text(f"SELECT count(*) FROM {index.name} WHERE {index.name} MATCH :match"),
+                       {"match": match}).scalar()
+    rows = db.execute(text(sql), {"match": match, "limit": limit, "offset": offset,
+                                  "open": mark[0], "close": mark[1]}).mappings().all()
+    return {"total": total, "items": [dict(row) for row in rows]}
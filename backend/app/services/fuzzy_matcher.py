@@ -0,0 +1,209 @@
+"""
+Blocked, parallel fuzzy name matching between two tables.
+
+Replaces the `iterrows()` + `process.extractOne` loops (O(N x M) in pure
+Python) of the comparison scripts:
+
+- candidates are blocked: rows are only compared within the same block key
+  (e.g. normalized wilaya) and, optionally, when they share their first
+  token or a character n-gram of the name,
+- each block is scored with `rapidfuzz.process.cdist` (C++, all cores with
+  workers=-1) into a float32 matrix, in chunks of query rows sized so that
+  one matrix stays within CDIST_MEMORY_BUDGET; the best score of each row is
+  then recomputed exactly (float64, as extractOne returns it),
+- rows whose best in-block score stays below a threshold can fall back to
+  a search over the whole other table, so a mis-keyed wilaya does not hide
+  a match,
+- context columns of the best match are joined back with one vectorized
+  reindex instead of per-row `.loc` lookups.
+
+Without blocking, `best_matches` returns what extractOne returned row by row
+(same scorer, first best candidate on ties) for every non-zero score.
+
+Usage (from backend/):
+    python -m app.services.fuzzy_matcher A.csv B.csv --name-a اسم_الشركة --name-b name \
+        --block-a الولاية --block-b wilaya --keys first_token --fallback-below 85 --out matches.csv
+"""
+
+import argparse
+import os
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from app.services.normalization import compact_key as block_key, normalize_names
+
+# Bytes of one cdist score matrix (float32): query rows per chunk = budget / (4 x choices)
+CDIST_MEMORY_BUDGET = int(os.getenv("FUZZY_CDIST_MEMORY_MB", 64)) * 1024 * 1024
+NGRAM = 3
+KEY_MODES = ("none", "first_token", "ngram")
+
+
+def name_keys(name: str, mode: str) -> set:
+    """Secondary blocking keys of an (already normalized) name."""
+    if mode == "none":
+        return {""}
+    tokens = name.split()
+    if not tokens:
+        return set()
+    if mode == "first_token":
+        return {tokens[0]}
+    if mode == "ngram":
+        compact = "".join(tokens)
+        return {compact[i:i + NGRAM] for i in range(max(len(compact) - NGRAM + 1, 1))}
+    raise ValueError(f"Unknown key mode '{mode}', expected one of {KEY_MODES}")
+
+
+def _block_index(names, blocks, mode: str) -> dict:
+    index = defaultdict(list)
+    for pos, name in enumerate(names):
+        if not name:
+            continue
+        block = blocks[pos] if blocks is not None else ""
+        for key in name_keys(name, mode):
+            index[(block, key)].append(pos)
+    return index
+
+
+def chunk_rows(n_choices: int, chunk_size: int = None) -> int:
+    """Query rows per cdist call: `chunk_size` if given, else what fits in CDIST_MEMORY_BUDGET."""
+    if chunk_size:
+        return chunk_size
+    return max(1, CDIST_MEMORY_BUDGET // (np.dtype(np.float32).itemsize * max(n_choices, 1)))
+
+
+def _score_block(query_names, query_pos, choice_names, choice_pos, best_scores, best_idx,
+                 scorer, score_cutoff, workers, chunk_size):
+    """cdist of one block; keeps, per query row, the best score (lowest choice position on ties)."""
+    choices = [choice_names[p] for p in choice_pos]
+    choice_pos = np.asarray(choice_pos)
+    step = chunk_rows(len(choices), chunk_size)
+    for start in range(0, len(query_pos), step):
+        rows = query_pos[start:start + step]
+        matrix = process.cdist([query_names[p] for p in rows], choices, scorer=scorer,
+                               score_cutoff=score_cutoff, dtype=np.float32, workers=workers)
+        best = matrix.argmax(axis=1)
+        approx = matrix[np.arange(len(rows)), best]
+        del matrix
+        for row, approx_score, b in zip(rows, approx, best):
+            if approx_score <= 0:
+                continue
+            # Exact score of the winner: float32 only served to rank the candidates
+            score = scorer(query_names[row], choices[b], score_cutoff=score_cutoff)
+            candidate = choice_pos[b]
+            if score <= 0:
+                continue
+            if score > best_scores[row] or (score == best_scores[row] and candidate < best_idx[row]):
+                best_scores[row] = score
+                best_idx[row] = candidate
+
+
+def best_matches(names_a, names_b, blocks_a=None, blocks_b=None, key_mode: str = "none",
+                 scorer=fuzz.token_sort_ratio, score_cutoff: float = 0, fallback_below: float = None,
+                 workers: int = -1, chunk_size: int = None):
+    """
+    Best match in `names_b` for every name of `names_a` (both already normalized).
+
+    `blocks_a` / `blocks_b` are optional block keys (see block_key) and
+    `key_mode` adds first-token or n-gram keys inside each block. Scores below
+    `score_cutoff` are dropped. With `fallback_below`, rows whose best score in
+    their blocks is lower than it are scored against all of `names_b`.
+    `chunk_size` fixes the query rows per cdist call (default: memory budget).
+    Returns (scores, indexes) arrays; rows without a candidate get score 0 and
+    index -1.
+    """
+    names_a = ["" if n is None else str(n) for n in names_a]
+    names_b = ["" if n is None else str(n) for n in names_b]
+    best_scores = np.zeros(len(names_a), dtype=np.float64)
+    best_idx = np.full(len(names_a), -1, dtype=np.int64)
+    if not names_a or not names_b:
+        return best_scores, best_idx
+
+    index_a = _block_index(names_a, blocks_a, key_mode)
+    index_b = _block_index(names_b, blocks_b, key_mode)
+    for key, query_pos in index_a.items():
+        choice_pos = index_b.get(key)
+        if choice_pos:
+            _score_block(names_a, query_pos, names_b, choice_pos, best_scores, best_idx,
+                         scorer, score_cutoff, workers, chunk_size)
+
+    if fallback_below is not None and (blocks_a is not None or key_mode != "none"):
+        missing = [pos for pos, name in enumerate(names_a) if name and (best_idx[pos] < 0 or best_scores[pos] < fallback_below)]
+        if missing:
+            all_b = [pos for pos, name in enumerate(names_b) if name]
+            _score_block(names_a, missing, names_b, all_b, best_scores, best_idx,
+                         scorer, score_cutoff, workers, chunk_size)
+    return best_scores, best_idx
+
+
+def join_context(df_a: pd.DataFrame, df_b: pd.DataFrame, b_index, columns, prefix: str = "", suffix: str = ""):
+    """Columns of the matched df_b rows aligned on df_a (None where there is no match)."""
+    available = [c for c in columns if c in df_b.columns]
+    ctx = df_b[available].reset_index(drop=True).astype(object).reindex(np.asarray(b_index))
+    ctx = ctx.where(ctx.notna(), None)
+    ctx.index = df_a.index
+    ctx.columns = [f"{prefix}{c}{suffix}" for c in available]
+    for c in columns:
+        if c not in df_b.columns:
+            ctx[f"{prefix}{c}{suffix}"] = None
+    return ctx
+
+
+def match_frames(df_a, df_b, name_a: str, name_b: str, normalize=None, block_a: str = None,
+                 block_b: str = None, key_mode: str = "none", score_cutoff: float = 0,
+                 fallback_below: float = None, workers: int = -1):
+    """
+    Match two DataFrames on their name columns. `normalize` maps a name Series
+    to normalized names (default: normalize_names with generic tokens stripped).
+    Returns df_a with `match_score` and `b_index` (NaN when no candidate) columns added.
+    """
+    normalize = normalize or (lambda names: normalize_names(names, strip_generic=True))
+    names_a = normalize(df_a[name_a]).tolist()
+    names_b = normalize(df_b[name_b]).tolist()
+    blocks_a = df_a[block_a].map(block_key).tolist() if block_a else None
+    blocks_b = df_b[block_b].map(block_key).tolist() if block_b else None
+
+    scores, idx = best_matches(names_a, names_b, blocks_a, blocks_b, key_mode=key_mode,
+                               score_cutoff=score_cutoff, fallback_below=fallback_below, workers=workers)
+    res = df_a.copy()
+    res["match_score"] = scores
+    res["b_index"] = pd.Series(idx, index=df_a.index).where(idx >= 0)
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blocked fuzzy matching of two CSV files by name")
+    parser.add_argument("csv_a")
+    parser.add_argument("csv_b")
+    parser.add_argument("--name-a", default="name")
+    parser.add_argument("--name-b", default="name")
+    parser.add_argument("--block-a", help="block column in A (e.g. wilaya)")
+    parser.add_argument("--block-b", help="block column in B")
+    parser.add_argument("--keys", choices=KEY_MODES, default="none", help="secondary blocking keys")
+    parser.add_argument("--cutoff", type=float, default=0, help="minimum score kept")
+    parser.add_argument("--fallback-below", type=float,
+                        help="search all of B for rows whose best in-block score is below this")
+    parser.add_argument("--context", nargs="*", default=[], help="B columns joined to the output")
+    parser.add_argument("--workers", type=int, default=-1)
+    parser.add_argument("--encoding", default="utf-8-sig")
+    parser.add_argument("--out", default="fuzzy_matches.csv")
+    args = parser.parse_args()
+    if bool(args.block_a) != bool(args.block_b):
+        parser.error("--block-a and --block-b go together")
+
+    df_a = pd.read_csv(args.csv_a, encoding=args.encoding)
+    df_b = pd.read_csv(args.csv_b, encoding=args.encoding)
+    res = match_frames(df_a, df_b, args.name_a, args.name_b, block_a=args.block_a, block_b=args.block_b,
+                       key_mode=args.keys, score_cutoff=args.cutoff, fallback_below=args.fallback_below,
+                       workers=args.workers)
+    ctx = join_context(res, df_b, res["b_index"].fillna(-1).astype(int), [args.name_b] + args.context, suffix="_b")
+    res = pd.concat([res, ctx], axis=1)
+    res.to_csv(args.out, index=False, encoding=args.encoding)
+    print(f"[INFO] {len(res)} lignes, {int(res['b_index'].notna().sum())} avec un candidat")
+    print(f"[OK] {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Investigation history: every cross-check analysis is stored in the
+`investigations` table with the sources used, the hash of its inputs, the
+model and timings. The table is the audit trail behind the dossier page, and
+it lets run_investigation skip a new analysis while the Ahlya, JORT and RNE
+inputs of a company, the model and the prompt are unchanged since its last
+successful one.
+
+Unlike llm_cache entries, rows are never evicted. Fallback analyses (rate
+limit, timeout...) are recorded with their `error` but never reused.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, select, update
+
+from app.database import AsyncSessionLocal
+from app.models.investigation_models import Investigation
+
+
+def as_dict(row: Investigation) -> dict:
+    return {
+        "id": row.id,
+        "company_id": row.company_id,
+        "company_name": row.company_name,
+        "wilaya": row.wilaya,
+        "analysis": row.analysis,
+        "status": row.status,
+        "sources_used": row.sources_used,
+        "error": row.error,
+        "input_hash": row.input_hash,
+        "model": row.model,
+        "config_hash": row.config_hash,
+        "llm_cached": row.llm_cached,
+        "timings": row.timings,
+        "requested_by": row.requested_by,
+        "created_at": row.created_at,
+        "reuse_count": row.reuse_count,
+        "last_reused_at": row.last_reused_at,
+    }
+
+
+async def find_reusable(company_id: str, input_hash: str, model: str, config_hash: str) -> Optional[Investigation]:
+    """Latest successful analysis of these exact inputs with this model and prompt, counted as reused."""
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(Investigation)
+            .where(
+                Investigation.company_id == company_id,
+                Investigation.input_hash == input_hash,
+                Investigation.model == model,
+                Investigation.config_hash == config_hash,
+                Investigation.error.is_(None),
+            )
+            .order_by(Investigation.created_at.desc())
+            .limit(1)
+        )).scalars().first()
+        if row is None:
+            return None
+        await db.execute(
+            update(Investigation).where(Investigation.id == row.id)
+            .values(reuse_count=Investigation.reuse_count + 1, last_reused_at=datetime.utcnow())
+        )
+        await db.commit()
+    return row
+
+
+async def record(**fields) -> Investigation:
+    row = Investigation(**fields)
+    async with AsyncSessionLocal() as db:
+        db.add(row)
+        await db.commit()
+    return row
+
+
+async def get(investigation_id: int) -> Optional[Investigation]:
+    async with AsyncSessionLocal() as db:
+        return await db.get(Investigation, investigation_id)
+
+
+async def list_page(company_id: str = None, status: str = None, page: int = 1, per_page: int = 20) -> dict:
+    """Most recent analyses first, with the enrichment list's pagination fields."""
+    query = select(Investigation)
+    if company_id:
+        query = query.where(Investigation.company_id == company_id)
+    if status:
+        query = query.where(Investigation.status == status)
+    async with AsyncSessionLocal() as db:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        rows = (await db.execute(
+            query.order_by(Investigation.created_at.desc(), Investigation.id.desc())
+            .offset((page - 1) * per_page).limit(per_page)
+        )).scalars().all()
+    return {
+        "investigations": [as_dict(row) for row in rows],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "total_pages": (total + per_page - 1) // per_page if total > 0 else 1,
+    }
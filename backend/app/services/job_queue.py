@@ -0,0 +1,327 @@
+"""
+In-process background job queue backed by SQLite.
+
+A job is a row of `investigation_jobs`: submitting inserts it as `queued`,
+JOB_WORKERS asyncio workers claim the oldest queued row with an atomic
+UPDATE ... RETURNING, run the handler registered for its `kind`, and store
+the JSON result (or the error) on the row. Results therefore outlive the
+HTTP request that submitted them and the process itself.
+
+Several processes can share the queue: a claimed job records the claiming
+process (`worker_id`) and a lease that its heartbeat renews while the job
+runs. Stopping queues the interrupted jobs again; a running job whose lease
+has expired (its process died) is queued again by whichever process notices
+it first.
+
+Cancelling marks the row `cancelled`; the process running the job cancels
+its asyncio task (at once if it is this one, at its next heartbeat
+otherwise). `stats()` reports queue depth and throughput.
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, select, update
+
+from app.database import AsyncSessionLocal
+from app.models.investigation_models import InvestigationJob
+from app.services.rate_limit import backoff_delay
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+# Workers are woken on submit; the poll also picks up jobs queued by other processes
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 5))
+# Renewed every third of its length while the job runs
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 60))
+# Backoff after a database error in a worker, and retries of a job's outcome write
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", 0.5))
+JOB_RETRY_MAX_DELAY = float(os.getenv("JOB_RETRY_MAX_DELAY", 30))
+JOB_FINISH_RETRIES = int(os.getenv("JOB_FINISH_RETRIES", 5))
+
+FINISHED_STATES = ("done", "failed", "cancelled")
+
+
+def _error_line(e: Exception) -> str:
+    # SQLAlchemy errors append the statement and a help link on further lines
+    return f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers = {}
+        self._tasks = []
+        self._heartbeat_task = None
+        self._running = {}
+        self._cancelled = set()
+        self._wakeup = None
+        self._stopping = False
+        self.counters = {"done": 0, "failed": 0, "cancelled": 0, "worker_errors": 0, "run_seconds": 0.0}
+
+    def register(self, kind: str, handler):
+        """`handler(**params)` is a coroutine function returning a JSON-serializable result."""
+        self._handlers[kind] = handler
+
+    # ── Lifecycle ────────────────────────────────────────────────────────
+
+    async def start(self):
+        if self._tasks or self.workers <= 0:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        await self._requeue_expired()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Stop the workers and queue their interrupted jobs again."""
+        self._stopping = True
+        tasks = self._tasks + ([self._heartbeat_task] if self._heartbeat_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._heartbeat_task = None
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(InvestigationJob)
+                .where(InvestigationJob.status == "running", InvestigationJob.worker_id == self.worker_id)
+                .values(status="queued", started_at=None, worker_id=None, lease_expires_at=None)
+            )
+            await db.commit()
+
+    # ── Submit / cancel ──────────────────────────────────────────────────
+
+    async def submit(self, kind: str, params: dict, company_id: str = None, submitted_by: str = None) -> InvestigationJob:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        job = InvestigationJob(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            company_id=company_id,
+            params=params,
+            status="queued",
+            attempts=0,
+            submitted_at=datetime.utcnow(),
+            submitted_by=submitted_by,
+        )
+        async with AsyncSessionLocal() as db:
+            db.add(job)
+            await db.commit()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def cancel(self, job_id: str):
+        """Cancel a queued or running job; returns the job (None if unknown)."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(InvestigationJob)
+                .where(InvestigationJob.id == job_id, InvestigationJob.status.in_(("queued", "running")))
+                .values(status="cancelled", finished_at=datetime.utcnow(), lease_expires_at=None)
+            )
+            await db.commit()
+        if result.rowcount:
+            self.counters["cancelled"] += 1
+            await self._cancel_task(job_id)
+        return await self.get(job_id)
+
+    async def _cancel_task(self, job_id: str):
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def get(self, job_id: str):
+        async with AsyncSessionLocal() as db:
+            return await db.get(InvestigationJob, job_id)
+
+    # ── Workers ──────────────────────────────────────────────────────────
+
+    async def _claim(self):
+        """Atomically move the oldest queued job to `running` under a lease held by this process."""
+        now = datetime.utcnow()
+        oldest = (
+            select(InvestigationJob.id).where(InvestigationJob.status == "queued")
+            .order_by(InvestigationJob.submitted_at).limit(1).scalar_subquery()
+        )
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                update(InvestigationJob)
+                .where(InvestigationJob.id == oldest, InvestigationJob.status == "queued")
+                .values(
+                    status="running", started_at=now, attempts=InvestigationJob.attempts + 1,
+                    worker_id=self.worker_id, lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS),
+                )
+                .returning(InvestigationJob.id, InvestigationJob.kind, InvestigationJob.params)
+            )).first()
+            await db.commit()
+        return row
+
+    async def _finish(self, job_id: str, status: str, result=None, error: str = None):
+        """
+        Record the outcome of a job claimed by this process. A no-op when the
+        row is no longer `running` under this worker (cancelled, or queued
+        again after a lost lease), so a late outcome never overwrites it.
+        Failed writes ("database is locked"...) are retried JOB_FINISH_RETRIES
+        times before giving up, the lease then bringing the job back.
+        """
+        query = (
+            update(InvestigationJob)
+            .where(InvestigationJob.id == job_id, InvestigationJob.status == "running",
+                   InvestigationJob.worker_id == self.worker_id)
+            .values(status=status, result=result, error=error, finished_at=datetime.utcnow(),
+                    lease_expires_at=None)
+        )
+        attempt = 0
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    updated = await db.execute(query)
+                    await db.commit()
+                break
+            except Exception as e:
+                if attempt >= JOB_FINISH_RETRIES:
+                    raise
+                delay = backoff_delay(attempt, JOB_RETRY_BASE_DELAY, JOB_RETRY_MAX_DELAY)
+                attempt += 1
+                print(f"Job queue: recording job {job_id} failed ({_error_line(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        if updated.rowcount:
+            self.counters[status] += 1
+
+    async def _requeue_expired(self):
+        """Queue again the running jobs whose lease has expired (their process is gone)."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(InvestigationJob)
+                .where(
+                    InvestigationJob.status == "running",
+                    or_(InvestigationJob.lease_expires_at.is_(None),
+                        InvestigationJob.lease_expires_at < datetime.utcnow()),
+                )
+                .values(status="queued", started_at=None, worker_id=None, lease_expires_at=None)
+            )
+            await db.commit()
+        if result.rowcount:
+            print(f"Job queue: {result.rowcount} interrupted job(s) queued again")
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    async def _heartbeat(self):
+        """Renew the leases of this process's jobs, cancel those cancelled elsewhere, recover expired ones."""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                if self._running:
+                    async with AsyncSessionLocal() as db:
+                        await db.execute(
+                            update(InvestigationJob)
+                            .where(InvestigationJob.id.in_(list(self._running)),
+                                   InvestigationJob.status == "running",
+                                   InvestigationJob.worker_id == self.worker_id)
+                            .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS))
+                        )
+                        still_ours = set((await db.execute(
+                            select(InvestigationJob.id)
+                            .where(InvestigationJob.id.in_(list(self._running)),
+                                   InvestigationJob.status == "running",
+                                   InvestigationJob.worker_id == self.worker_id)
+                        )).scalars())
+                        await db.commit()
+                    for job_id in set(self._running) - still_ours:
+                        await self._cancel_task(job_id)
+                await self._requeue_expired()
+            except Exception as e:
+                print(f"Job queue: heartbeat failed: {e}")
+
+    async def _worker(self):
+        """Claim and run jobs until stopped; database errors are logged and retried with backoff."""
+        failures = 0
+        while not self._stopping:
+            try:
+                # Cleared before the claim: a submit() during an empty claim still wakes us
+                self._wakeup.clear()
+                job = await self._claim()
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await self._run(*job)
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["worker_errors"] += 1
+                delay = backoff_delay(failures, JOB_RETRY_BASE_DELAY, JOB_RETRY_MAX_DELAY)
+                failures += 1
+                print(f"Job queue: worker error ({_error_line(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _run(self, job_id: str, kind: str, params: dict):
+        handler = self._handlers.get(kind)
+        if handler is None:
+            await self._finish(job_id, "failed", error=f"Unknown job kind '{kind}'")
+            return
+        start = time.perf_counter()
+        task = asyncio.create_task(handler(**(params or {})))
+        self._running[job_id] = task
+        try:
+            try:
+                outcome = {"status": "done", "result": await task}
+            except asyncio.CancelledError:
+                if job_id not in self._cancelled:
+                    # Shutdown: stop() queues the job again
+                    task.cancel()
+                    raise
+                # Cancelled through cancel(), which records it
+                return
+            except Exception as e:
+                outcome = {"status": "failed", "error": str(getattr(e, "detail", e))}
+            # Still in _running: the heartbeat renews the lease while the outcome is written
+            await self._finish(job_id, **outcome)
+        finally:
+            self._running.pop(job_id, None)
+            self._cancelled.discard(job_id)
+            self.counters["run_seconds"] += time.perf_counter() - start
+
+    # ── Metrics ──────────────────────────────────────────────────────────
+
+    async def stats(self) -> dict:
+        hour_ago = datetime.utcnow() - timedelta(hours=1)
+        async with AsyncSessionLocal() as db:
+            by_status = dict((await db.execute(
+                select(InvestigationJob.status, func.count()).group_by(InvestigationJob.status)
+            )).all())
+            finished_last_hour = await db.scalar(
+                select(func.count()).select_from(InvestigationJob)
+                .where(InvestigationJob.status == "done", InvestigationJob.finished_at >= hour_ago)
+            )
+            oldest_queued = await db.scalar(
+                select(func.min(InvestigationJob.submitted_at)).where(InvestigationJob.status == "queued")
+            )
+        finished = self.counters["done"] + self.counters["failed"] + self.counters["cancelled"]
+        return {
+            "workers": len(self._tasks),
+            "queue_depth": by_status.get("queued", 0),
+            "running": by_status.get("running", 0),
+            "by_status": by_status,
+            "oldest_queued_age_s": (
+                round((datetime.utcnow() - oldest_queued).total_seconds(), 1) if oldest_queued else None
+            ),
+            "done_last_hour": finished_last_hour,
+            "throughput_per_min": round(finished_last_hour / 60, 2),
+            # Since this process started
+            "processed": dict(self.counters, run_seconds=round(self.counters["run_seconds"], 1)),
+            "avg_run_seconds": round(self.counters["run_seconds"] / finished, 2) if finished else None,
+        }
+
+
+job_queue = JobQueue()
@@ -0,0 +1,144 @@
+"""
+Persistent, content-addressed cache of Gemini cross-check results.
+
+Requests are deterministic (temperature 0, topK 1), so a result is fully
+determined by the model, the system prompt, the generation config and the
+three source payloads. The cache key is the sha256 of those inputs, the
+payloads canonicalized (sorted keys, compact JSON) so that key order does not
+matter. Bump CACHE_KEY_VERSION when the prompt template (_build_prompt)
+changes.
+
+Entries live in the `llm_cache` SQLite table: they expire after
+LLM_CACHE_TTL_DAYS and, beyond LLM_CACHE_MAX_ENTRIES, the least recently used
+are evicted. Each entry keeps the token usage of its original call, so hits
+count the tokens (and the rate-limit budget) they saved.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, update
+
+from app.database import AsyncSessionLocal
+from app.models.investigation_models import LLMCacheEntry
+
+CACHE_KEY_VERSION = 1
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", 30))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def cache_key(model: str, system_prompt: str, generation_config: dict, ahlya_data: dict, jort_data: dict,
+              rne_data: dict) -> str:
+    payload = _canonical([CACHE_KEY_VERSION, model, system_prompt, generation_config,
+                          ahlya_data or {}, jort_data or {}, rne_data or {}])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def input_hash(ahlya_data: dict, jort_data: dict, rne_data: dict) -> str:
+    """Hash of the three source payloads alone (investigation history, see investigation_history.py)."""
+    payload = _canonical([ahlya_data or {}, jort_data or {}, rne_data or {}])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def analysis_config_hash(model: str, system_prompt: str, generation_config: dict) -> str:
+    """Hash of everything but the payloads that determines a result (investigation history)."""
+    payload = _canonical([CACHE_KEY_VERSION, model, system_prompt, generation_config])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResultCache:
+    """SQLite-backed result cache with TTL and LRU size bound; hit/miss counters per process."""
+
+    def __init__(self, ttl_days: float = LLM_CACHE_TTL_DAYS, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.ttl = timedelta(days=ttl_days)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl.total_seconds() > 0 and self.max_entries > 0
+
+    async def get(self, key: str):
+        """Cached result for `key` (a dict), or None when absent or expired."""
+        if not self.enabled:
+            return None
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            entry = await db.get(LLMCacheEntry, key)
+            if entry is None or entry.expires_at <= now:
+                with self._lock:
+                    self.misses += 1
+                return None
+            await db.execute(
+                update(LLMCacheEntry).where(LLMCacheEntry.key == key)
+                .values(hits=LLMCacheEntry.hits + 1, last_used_at=now)
+            )
+            await db.commit()
+        with self._lock:
+            self.hits += 1
+            self.tokens_saved += entry.total_tokens or 0
+        return dict(entry.result)
+
+    async def set(self, key: str, model: str, result: dict, usage: dict = None):
+        if not self.enabled:
+            return
+        usage = usage or {}
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            await db.merge(LLMCacheEntry(
+                key=key,
+                model=model,
+                result=result,
+                prompt_tokens=usage.get("promptTokenCount", 0),
+                total_tokens=usage.get("totalTokenCount", 0),
+                hits=0,
+                created_at=now,
+                expires_at=now + self.ttl,
+                last_used_at=now,
+            ))
+            await db.flush()
+            await self._evict(db, now)
+            await db.commit()
+
+    async def _evict(self, db, now: datetime):
+        await db.execute(delete(LLMCacheEntry).where(LLMCacheEntry.expires_at <= now))
+        count = await db.scalar(select(func.count()).select_from(LLMCacheEntry))
+        excess = (count or 0) - self.max_entries
+        if excess > 0:
+            oldest = select(LLMCacheEntry.key).order_by(LLMCacheEntry.last_used_at).limit(excess)
+            await db.execute(delete(LLMCacheEntry).where(LLMCacheEntry.key.in_(oldest)))
+
+    async def stats(self) -> dict:
+        async with AsyncSessionLocal() as db:
+            entries, hits_total, tokens_saved_total = (await db.execute(select(
+                func.count(),
+                func.coalesce(func.sum(LLMCacheEntry.hits), 0),
+                func.coalesce(func.sum(LLMCacheEntry.hits * LLMCacheEntry.total_tokens), 0),
+            ))).one()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_days": self.ttl.total_seconds() / 86400,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "tokens_saved": self.tokens_saved,
+                # Since the entries still cached were created (survives restarts)
+                "hits_total": hits_total,
+                "tokens_saved_total": tokens_saved_total,
+            }
+
+
+llm_cache = LLMResultCache()
@@ -9,13 +9,19 @@ et éviter le routage automatique vers v1beta qui provoque des erreurs
 404 sur Render et autres plateformes cloud.
 """
 
+import asyncio
 import os
 import json
 import logging
+import time
 from datetime import datetime
+from importlib.util import find_spec
 
 import httpx
 
+from app.services.llm_cache import cache_key, llm_cache
+from app.services.rate_limit import TokenBucket, backoff_delay
+
 # Configuration du logging spécifique au module Ba7ath
 logger = logging.getLogger("ba7ath.llm")
 logger.setLevel(logging.INFO)
@@ -26,6 +32,33 @@ GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
 GEMINI_MODEL = "gemini-2.0-flash"
 GEMINI_ENDPOINT = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:generateContent"
 
+# Déterminisme total : une même entrée donne le même résultat (d'où le cache)
+GENERATION_CONFIG = {
+    "temperature": 0.0,
+    "topP": 1,
+    "topK": 1,
+    "responseMimeType": "application/json"
+}
+
+# ── HTTP client (shared, keep-alive) ──────────────────────────────────────
+
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", 10))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", 5))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", 60))
+# HTTP/2 multiplexe les requêtes sur une connexion (nécessite le paquet h2)
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "1") not in ("0", "false", "False") and find_spec("h2") is not None
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 10))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", 60))
+LLM_WRITE_TIMEOUT = float(os.getenv("LLM_WRITE_TIMEOUT", 10))
+LLM_POOL_TIMEOUT = float(os.getenv("LLM_POOL_TIMEOUT", 10))
+
+# Débit maximal vers Gemini, pour tout le processus (0 = illimité), et rafale tolérée
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 60))
+LLM_BURST = int(os.getenv("LLM_BURST", 5))
+# Réessais (429, 5xx, erreurs réseau) : backoff exponentiel avec gigue
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 1.0))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", 30.0))
+
 # ── System Prompt (Expert Investigation) ──────────────────────────────────
 
 SYSTEM_PROMPT = """أنت خبير تدقيق محقق في مشروع 'بحث' (Ba7ath). مهمتك هي مقارنة البيانات بدقة متناهية.
@@ -71,11 +104,90 @@ class LLMAnalysisService:
 
     def __init__(self):
         self.api_key = os.getenv("GEMINI_API_KEY")
+        self._client = None
+        self._http_stats = {"requests": 0, "new_connections": 0, "connect_ms_total": 0.0, "retries": 0}
+        self.rate_limiter = TokenBucket(LLM_REQUESTS_PER_MINUTE / 60, LLM_BURST)
         if not self.api_key:
             logger.warning("⚠️ GEMINI_API_KEY not set — LLM analysis will be unavailable")
         else:
             logger.info(f"✅ LLMAnalysisService initialized — model: {GEMINI_MODEL} (REST API direct)")
 
+    # ── Client HTTP partagé (ouvert/fermé avec l'application) ────────────
+
+    @staticmethod
+    def _create_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=LLM_HTTP2,
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                connect=LLM_CONNECT_TIMEOUT,
+                read=LLM_READ_TIMEOUT,
+                write=LLM_WRITE_TIMEOUT,
+                pool=LLM_POOL_TIMEOUT,
+            ),
+        )
+
+    async def start(self):
+        """Ouvre le client partagé (startup de l'application)."""
+        if self._client is None:
+            self._client = self._create_client()
+            logger.info(f"LLM HTTP client opened (http2={LLM_HTTP2}, max_connections={LLM_HTTP_MAX_CONNECTIONS})")
+
+    async def close(self):
+        """Ferme le client partagé et ses connexions keep-alive (shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Ouverture paresseuse pour les scripts qui n'exécutent pas le startup
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    async def _post(self, url: str, body: dict):
+        """POST sur le client partagé ; renvoie (réponse, timings) avec le temps d'établissement de connexion."""
+        setup = {}
+
+        async def trace(event_name: str, info: dict):
+            # httpcore : connection.connect_tcp.started ... connection.start_tls.complete
+            if event_name == "connection.connect_tcp.started":
+                setup["start"] = time.perf_counter()
+            elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete") and "start" in setup:
+                setup["end"] = time.perf_counter()
+
+        await self.rate_limiter.acquire()
+        start = time.perf_counter()
+        response = await self.client.post(
+            url, json=body, headers={"Content-Type": "application/json"}, extensions={"trace": trace}
+        )
+        connect_ms = (setup["end"] - setup["start"]) * 1000 if "end" in setup else 0.0
+        timings = {
+            "connect_ms": round(connect_ms, 1),
+            "total_ms": round((time.perf_counter() - start) * 1000, 1),
+            "reused_connection": "start" not in setup,
+            "http_version": response.http_version,
+        }
+        self._http_stats["requests"] += 1
+        if not timings["reused_connection"]:
+            self._http_stats["new_connections"] += 1
+            self._http_stats["connect_ms_total"] += connect_ms
+        return response, timings
+
+    def http_stats(self) -> dict:
+        stats = dict(self._http_stats)
+        stats["connect_ms_total"] = round(stats["connect_ms_total"], 1)
+        stats["rate_limit_wait_s"] = round(self.rate_limiter.waited_seconds, 1)
+        stats["connection_reuse_rate"] = (
+            round(1 - stats["new_connections"] / stats["requests"], 4) if stats["requests"] else None
+        )
+        return stats
+
     @staticmethod
     def _build_prompt(ahlya_data: dict, jort_data: dict, rne_data: dict) -> str:
         """Construit un prompt structuré avec les trois sources de données."""
@@ -116,10 +228,49 @@ class LLMAnalysisService:
   "summary_ar": "ملخص التحقيق هنا"
 }}"""
 
-    async def analyze_cross_check(self, ahlya_data: dict, jort_data: dict, rne_data: dict) -> dict:
-        """Exécute l'analyse croisée via l'API REST Gemini (v1 stable)."""
+    async def _post_with_retries(self, url: str, body: dict, retries: int, company_name: str):
+        """_post, réessayé jusqu'à `retries` fois sur 429, 5xx et erreurs réseau."""
+        attempt = 0
+        while True:
+            try:
+                response, timings = await self._post(url, body)
+            except httpx.TransportError as e:
+                if attempt >= retries:
+                    raise
+                reason, retry_after = type(e).__name__, None
+            else:
+                if attempt >= retries or not (response.status_code == 429 or response.status_code >= 500):
+                    timings["attempts"] = attempt + 1
+                    return response, timings
+                reason, retry_after = f"HTTP {response.status_code}", response.headers.get("retry-after")
+            delay = backoff_delay(attempt, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY, retry_after)
+            logger.warning(f"↻ {reason} for '{company_name}', retry {attempt + 1}/{retries} in {delay:.1f}s")
+            self._http_stats["retries"] += 1
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def analyze_cross_check(self, ahlya_data: dict, jort_data: dict, rne_data: dict,
+                                  force_refresh: bool = False, retries: int = 0) -> dict:
+        """
+        Exécute l'analyse croisée via l'API REST Gemini (v1 stable).
+        Les résultats sont servis depuis le cache persistant (llm_cache) pour
+        des entrées identiques, sauf avec force_refresh. Les 429/5xx sont
+        réessayés `retries` fois.
+        """
 
         company_name = ahlya_data.get("name", "Unknown")
+        key = cache_key(GEMINI_MODEL, SYSTEM_PROMPT, GENERATION_CONFIG, ahlya_data, jort_data, rne_data)
+
+        if not force_refresh:
+            try:
+                cached = await llm_cache.get(key)
+            except Exception as e:
+                logger.warning(f"⚠️ LLM cache read failed for '{company_name}': {e}")
+                cached = None
+            if cached is not None:
+                logger.info(f"♻️ Cached analysis for '{company_name}' ({key[:12]})")
+                cached["_cache"] = {"hit": True, "key": key}
+                return cached
 
         if not self.api_key:
             logger.error(f"LLM analysis skipped for '{company_name}': no API key")
@@ -139,23 +290,13 @@ class LLMAnalysisService:
                     "parts": [{"text": prompt}]
                 }
             ],
-            "generationConfig": {
-                "temperature": 0.0,
-                "topP": 1,
-                "topK": 1,
-                "responseMimeType": "application/json"
-            }
+            "generationConfig": GENERATION_CONFIG
         }
 
         url = f"{GEMINI_ENDPOINT}?key={self.api_key}"
 
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    url,
-                    json=request_body,
-                    headers={"Content-Type": "application/json"}
-                )
+            response, timings = await self._post_with_retries(url, request_body, retries, company_name)
 
             # ── Handle HTTP errors ───────────────────────────────────────
             if response.status_code == 429:
@@ -181,16 +322,24 @@ class LLMAnalysisService:
             logger.info(
                 f"✅ Analysis complete for '{company_name}' — "
                 f"score={result.get('match_score')}, status={result.get('status')}, "
-                f"time={elapsed:.1f}s"
+                f"time={elapsed:.1f}s, connect={timings['connect_ms']:.0f}ms"
+                f"{' (reused)' if timings['reused_connection'] else ''}"
             )
+            # Seuls les résultats réussis sont mis en cache (jamais les réponses de secours)
+            try:
+                await llm_cache.set(key, GEMINI_MODEL, result, resp_json.get("usageMetadata"))
+            except Exception as e:
+                logger.warning(f"⚠️ LLM cache write failed for '{company_name}': {e}")
+            result["_timings"] = timings
+            result["_cache"] = {"hit": False, "key": key}
             return result
 
         except json.JSONDecodeError as e:
             logger.error(f"❌ JSONDecodeError for '{company_name}': {e}")
             return _fallback_response("json_parse_error", "تعذّر تحليل استجابة النموذج.")
 
-        except httpx.TimeoutException:
-            logger.error(f"❌ Timeout for '{company_name}' (60s limit)")
+        except httpx.TimeoutException as e:
+            logger.error(f"❌ Timeout for '{company_name}' ({type(e).__name__})")
             return _fallback_response("timeout", "انتهت مهلة الاتصال بالنموذج.")
 
         except Exception as e:
@@ -0,0 +1,115 @@
+"""
+Company-name normalization shared by the loader, the importers, the search
+index and the matching scripts, so that every join and lookup key agrees.
+
+One pipeline, applied word by word:
+- upper-case (Latin), NFKD decomposition and removal of combining marks:
+  French accents, Arabic harakat and hamza carriers (أ/إ/آ → ا, ؤ → و, ئ → ي),
+- Arabic letter folding: ة → ه, ى → ي, ٱ → ا, tatweel removed,
+- whitespace collapsed;
+and, for fuzzy matching only (`strip_generic=True`), punctuation turned into
+spaces and generic tokens (شركة, الأهلية, SOCIETE, SARL...) dropped.
+
+`normalize_name` is LRU-cached for single values; `normalize_names` is the
+batch form for whole columns, memoizing each distinct word once per call.
+Both return exactly the same strings.
+
+`name_skeleton` is a coarser blocking key (generic tokens, the Arabic
+article, spaces, vowel letters and doubled letters removed) under which spelling variants of the
+same name collide; it is stored next to the normalized name in the database.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+import pandas as pd
+
+NORMALIZE_CACHE_SIZE = 65536
+
+_ARABIC_FOLD = str.maketrans({
+    "ة": "ه",
+    "ى": "ي",
+    "ٱ": "ا",
+    "ـ": None,  # tatweel
+})
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+# Generic words of company names, in normalized form
+GENERIC_TOKENS = frozenset({
+    # Arabic
+    "شركه", "الشركه", "اهليه", "الاهليه", "محليه", "المحليه", "جهويه", "الجهويه",
+    # French
+    "SOCIETE", "STE", "SA", "SARL", "SUARL", "ANONYME", "RESPONSABILITE", "LIMITEE",
+})
+# "à" of "société à responsabilité limitée", dropped with the phrase only
+_LEGAL_FORM_PHRASE = re.compile(r"(?<!\w)[aà]\s+responsabilit[eé]\s+limit[eé]e(?!\w)", re.IGNORECASE)
+
+
+def _fold_word(word: str, strip_generic: bool) -> list:
+    """Normalized word(s) for one whitespace-free token of the input."""
+    decomposed = unicodedata.normalize("NFKD", word.upper())
+    folded = "".join([c for c in decomposed if not unicodedata.combining(c)]).translate(_ARABIC_FOLD)
+    if strip_generic:
+        folded = _PUNCTUATION.sub(" ", folded)
+    # A compatibility decomposition may itself contain spaces, hence the re-split
+    words = folded.split()
+    if strip_generic:
+        words = [w for w in words if w not in GENERIC_TOKENS]
+    return words
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_name(value, strip_generic: bool = False) -> str:
+    """Normalized form of one name ("" for missing values)."""
+    if not isinstance(value, str):
+        return ""
+    if strip_generic:
+        value = _LEGAL_FORM_PHRASE.sub(" ", value)
+    return " ".join([w for token in value.split() for w in _fold_word(token, strip_generic)])
+
+
+def normalize_names(values, strip_generic: bool = False) -> pd.Series:
+    """Batch form of normalize_name over a Series (or any iterable) of names."""
+    words_cache = {}
+
+    def fold(token):
+        words = words_cache.get(token)
+        if words is None:
+            words = _fold_word(token, strip_generic)
+            words_cache[token] = words
+        return words
+
+    if not isinstance(values, pd.Series):
+        values = pd.Series(list(values), dtype=object)
+    strip = _LEGAL_FORM_PHRASE.sub if strip_generic else (lambda _, value: value)
+    normalized = [
+        " ".join([w for token in strip(" ", value).split() for w in fold(token)]) if isinstance(value, str) else ""
+        for value in values.to_numpy(dtype=object)
+    ]
+    return pd.Series(normalized, index=values.index, dtype=str)
+
+
+_VOWELS = re.compile(r"[AEIOUYاوي]")
+_REPEATS = re.compile(r"(.)\1+")
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def name_skeleton(value) -> str:
+    """Blocking key: consonant skeleton of the name without generic tokens ('' if nothing is left)."""
+    words = normalize_name(value, strip_generic=True).split()
+    stripped = "".join([w[2:] if w.startswith("ال") and len(w) > 3 else w for w in words])
+    return _REPEATS.sub(r"\1", _VOWELS.sub("", stripped))
+
+
+def compact_key(value) -> str:
+    """Normalized name without spaces, for keys such as wilayas ('بن عروس' == 'بنعروس')."""
+    return normalize_name(value).replace(" ", "")
+
+
+def clean_text(value):
+    """Display value cleanup for imports: stripped, single spaces, None when empty."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return " ".join(str(value).split()) or None
@@ -21,12 +21,9 @@ def generate_links(company_name: str, wilaya: str):
     return links
 
 def get_company_links(company_id: int):
-    from app.services.data_loader import get_companies_df
-    df = get_companies_df()
-    
-    company = df[df['id'] == company_id]
-    if company.empty:
+    from app.services.data_loader import get_company_index
+    row = get_company_index().get_by_id(company_id)
+    if row is None:
         return {}
     
-    row = company.iloc[0]
     return generate_links(row['name'], row['wilaya'])
@@ -0,0 +1,57 @@
+"""
+Async rate limiting and retry delays for calls to external APIs (Gemini).
+
+`TokenBucket` lets `capacity` calls through at once, then `rate` calls per
+second on average; callers await `acquire()` and are served in arrival order.
+`backoff_delay` is exponential backoff with full jitter (a random delay
+between 0 and base * 2^attempt, capped), so retrying clients spread out
+instead of hitting the API again in lockstep.
+"""
+
+import asyncio
+import random
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = None
+        self._loop = None
+        self.waited_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    async def acquire(self):
+        if not self.enabled:
+            return
+        # The lock belongs to the running event loop (scripts may run several loops)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: str = None) -> float:
+    """Delay before retry number `attempt + 1`; a Retry-After header (seconds) takes precedence."""
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), cap)
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,126 @@
+"""
+In-process response cache for read-only endpoints derived from the loaded dataset.
+
+Entries are keyed by route path + query string and tagged with the
+DataLoader's data version: they are validated and serialized through the
+route's response model once per dataset version and served as raw JSON bytes
+afterwards. Responses carry ETag / Last-Modified
+headers and conditional requests (If-None-Match / If-Modified-Since) are
+answered with 304 Not Modified.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
+
+from fastapi import HTTPException, Request, Response
+from pydantic import TypeAdapter
+
+from app.services.data_loader import get_data_version
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 512))
+
+
+class ResponseCache:
+    """Bounded LRU of serialized JSON bodies, invalidated when the data version changes."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, version: str):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def set(self, key: str, version: str, body: bytes):
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "version": self._version, "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache()
+
+
+def _request_key(request: Request) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+def _not_modified(request: Request, etag: str, last_modified) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Weak comparison: W/"x" and "x" designate the same representation
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or etag.removeprefix("W/") in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+@lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def _serialize(model, value) -> bytes:
+    """JSON body of `value` as FastAPI's response_model would send it (validated, filtered, by alias)."""
+    adapter = _adapter(model)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True), by_alias=True)
+
+
+def cached_response(request: Request, build, model) -> Response:
+    """
+    Serve `build()` through the response cache, serialized as `model` (the
+    route's response_model). `build` is only called on a cache miss for the
+    current data version; None is answered with 404 and not cached.
+    """
+    version, modified_at = get_data_version()
+    key = _request_key(request)
+    etag = 'W/"{}"'.format(hashlib.sha1(f"{version}:{key}".encode("utf-8")).hexdigest()[:20])
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(modified_at, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+
+    if _not_modified(request, etag, modified_at):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key, version)
+    if body is None:
+        value = build()
+        if value is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        body = _serialize(model, value)
+        # Don't cache a body built while a reload swapped the dataset under us
+        if get_data_version()[0] == version:
+            response_cache.set(key, version, body)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,4 +1,4 @@
-from app.services.data_loader import get_companies_df
+from app.services.data_loader import get_dataset
 from app.models.schemas import WilayaRisk, Flag
 import numpy as np
 
@@ -70,6 +70,24 @@ def generate_risk_commentary(wilaya_data: dict, risk_scores: dict) -> dict:
         "recommendations": recommendations
     }
 
+RESOURCE_GROUPS = ['AGRI_NATUREL', 'ENVIRONNEMENT', 'ENERGIE_MINES']
+
+def _score_and_flags(s1, s2, s3):
+    """Final Ba7ath index and risk flags from the three sub-scores."""
+    flags = []
+    if s1 > 0.6:
+        flags.append(Flag(code="RESOURCE_DEPENDENT", severity="high", label_ar="اعتماد كبير على الأنشطة المرتبطة بالموارد العمومية"))
+    if s2 > 0.7:
+        flags.append(Flag(code="ULTRA_CONCENTRATION", severity="medium", label_ar="تركيز عالٍ في مجموعة نشاط واحدة"))
+    if s3 > 0.5:
+        flags.append(Flag(code="GOVERNANCE_IMBALANCE", severity="low", label_ar="اختلال واضح بين الشركات المحلية والجهوية"))
+
+    # --- Final Score ---
+    # INDEX = 100 * (0.4 * s1 + 0.4 * s2 + 0.2 * s3)
+    raw_index = 100 * (0.4 * s1 + 0.4 * s2 + 0.2 * s3)
+    baath_index = round(min(raw_index, 100), 1)
+    return baath_index, flags
+
 def compute_baath_index_v2(wilaya_df):
     """
     Computes Ba7ath Index (0-100) using continuous formula:
@@ -83,39 +101,25 @@ def compute_baath_index_v2(wilaya_df):
         return 0.0, 0.0, 0.0, 0.0, []
 
     total = len(wilaya_df)
-    flags = []
 
     # --- s1: Resource Dependency ---
     # Groups: AGRI_NATUREL, ENVIRONNEMENT, ENERGIE_MINES
-    resource_groups = ['AGRI_NATUREL', 'ENVIRONNEMENT', 'ENERGIE_MINES']
-    resource_count = wilaya_df[wilaya_df['activity_group'].isin(resource_groups)].shape[0]
+    resource_count = wilaya_df[wilaya_df['activity_group'].isin(RESOURCE_GROUPS)].shape[0]
     s1 = resource_count / total if total > 0 else 0.0
     
-    if s1 > 0.6:
-        flags.append(Flag(code="RESOURCE_DEPENDENT", severity="high", label_ar="اعتماد كبير على الأنشطة المرتبطة بالموارد العمومية"))
-
     # --- s2: Sector Concentration ---
     # Max share of any single group
     group_counts = wilaya_df['activity_group'].value_counts(normalize=True)
     s2 = group_counts.max() if not group_counts.empty else 0.0
     
-    if s2 > 0.7:
-        flags.append(Flag(code="ULTRA_CONCENTRATION", severity="medium", label_ar="تركيز عالٍ في مجموعة نشاط واحدة"))
-
     # --- s3: Governance Imbalance ---
     # abs(% local - % regional)
     type_counts = wilaya_df['type'].value_counts(normalize=True)
     pct_local = type_counts.get('محلية', 0.0)
     pct_regional = type_counts.get('جهوية', 0.0)
     s3 = abs(pct_local - pct_regional)
-    
-    if s3 > 0.5:
-        flags.append(Flag(code="GOVERNANCE_IMBALANCE", severity="low", label_ar="اختلال واضح بين الشركات المحلية والجهوية"))
 
-    # --- Final Score ---
-    # INDEX = 100 * (0.4 * s1 + 0.4 * s2 + 0.2 * s3)
-    raw_index = 100 * (0.4 * s1 + 0.4 * s2 + 0.2 * s3)
-    baath_index = round(min(raw_index, 100), 1)
+    baath_index, flags = _score_and_flags(s1, s2, s3)
 
     # Return details for commentary
     details = {
@@ -125,13 +129,83 @@ def compute_baath_index_v2(wilaya_df):
 
     return baath_index, round(s1, 2), round(s2, 2), round(s3, 2), flags, details
 
+def _counts_by_wilaya(pair_counts):
+    """
+    Split a (wilaya, value) -> count Series into {wilaya: {value: count}}, each
+    ordered like Series.value_counts(): count descending, ties by first appearance.
+    """
+    by_wilaya = {}
+    for (wilaya, value), count in pair_counts.items():
+        by_wilaya.setdefault(wilaya, []).append((value, count))
+    return {
+        wilaya: dict(sorted(pairs, key=lambda item: item[1], reverse=True))
+        for wilaya, pairs in by_wilaya.items()
+    }
+
+def compute_baath_indices(df):
+    """
+    Single-pass engine: compute_baath_index_v2 for every wilaya at once.
+
+    Counts come from three group-bys over the whole frame instead of five
+    scans per wilaya slice; the scalar arithmetic below mirrors
+    compute_baath_index_v2 exactly (including numpy vs python float types,
+    which matter for round()). Returns {wilaya: (index, s1, s2, s3, flags, details)}.
+    """
+    if df.empty or 'wilaya' not in df.columns:
+        return {}
+
+    totals = df.groupby('wilaya', sort=False).size()
+    resource_counts = df['activity_group'].isin(RESOURCE_GROUPS).groupby(df['wilaya'], sort=False).sum()
+    groups_by_wilaya = _counts_by_wilaya(df.groupby(['wilaya', 'activity_group'], sort=False).size())
+    types_by_wilaya = _counts_by_wilaya(df.groupby(['wilaya', 'type'], sort=False).size())
+
+    results = {}
+    for wilaya, total in totals.items():
+        total = int(total)
+        groups = groups_by_wilaya.get(wilaya, {})
+        types = types_by_wilaya.get(wilaya, {})
+
+        s1 = int(resource_counts[wilaya]) / total if total > 0 else 0.0
+
+        group_counts = np.array(list(groups.values()), dtype=np.int64)
+        s2 = (group_counts / group_counts.sum()).max() if group_counts.size else 0.0
+
+        type_total = np.int64(sum(types.values()))
+        pct_local = types['محلية'] / type_total if 'محلية' in types else 0.0
+        pct_regional = types['جهوية'] / type_total if 'جهوية' in types else 0.0
+        s3 = abs(pct_local - pct_regional)
+
+        baath_index, flags = _score_and_flags(s1, s2, s3)
+        details = {'groups': groups, 'types': types}
+        results[wilaya] = (baath_index, round(s1, 2), round(s2, 2), round(s3, 2), flags, details)
+
+    return results
+
+def compute_wilaya_risks(df):
+    """WilayaRisk for every wilaya of the frame, in order of first appearance."""
+    risks = {}
+    for wilaya, (score, s1, s2, s3, flags, details) in compute_baath_indices(df).items():
+        editorial = generate_risk_commentary(details, {
+            's1': s1, 's2': s2, 's3': s3, 'baath_index': score
+        })
+        risks[wilaya] = WilayaRisk(
+            wilaya=wilaya,
+            baath_index=score,
+            s1=s1,
+            s2=s2,
+            s3=s3,
+            flags=flags,
+            **editorial
+        )
+    return risks
+
 def get_risk_for_wilaya(wilaya: str):
-    df = get_companies_df()
-    if df.empty:
+    dataset = get_dataset()
+    if dataset.companies_df.empty:
         return None
     
-    wilaya_df = df[df['wilaya'] == wilaya]
-    if wilaya_df.empty:
+    risk = dataset.wilaya_risks.get(wilaya)
+    if risk is None:
         # Return neutral risk if no companies
         return WilayaRisk(
             wilaya=wilaya, baath_index=0, s1=0, s2=0, s3=0, flags=[],
@@ -139,30 +213,13 @@ def get_risk_for_wilaya(wilaya: str):
             comment_ar="لا توجد بيانات كافية", recommendations=[]
         )
 
-    score, s1, s2, s3, flags, details = compute_baath_index_v2(wilaya_df)
-    
-    # Generate commentary
-    editorial = generate_risk_commentary(details, {
-        's1': s1, 's2': s2, 's3': s3, 'baath_index': score
-    })
-    
-    return WilayaRisk(
-        wilaya=wilaya,
-        baath_index=score,
-        s1=s1,
-        s2=s2,
-        s3=s3,
-        flags=flags,
-        **editorial
-    )
+    return risk
 
 def get_all_risks():
-    df = get_companies_df()
-    if df.empty:
+    dataset = get_dataset()
+    if dataset.companies_df.empty:
         return []
     
-    risks = []
-    for wilaya in df['wilaya'].unique():
-        risks.append(get_risk_for_wilaya(wilaya))
+    risks = list(dataset.wilaya_risks.values())
     
     return sorted(risks, key=lambda x: x.baath_index, reverse=True)
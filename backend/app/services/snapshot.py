@@ -0,0 +1,141 @@
+"""
+Ba7ath Data Snapshots
+=====================
+On-disk Arrow IPC (Feather v2) snapshot of the merged companies DataFrame.
+
+The snapshot is keyed by the content hashes of the source files (Ahlya, JORT,
+RNE...) and by SNAPSHOT_FORMAT_VERSION. A manifest keeps the size/mtime of
+every source so that an unchanged file is not re-hashed on each start.
+Snapshots are written uncompressed so they can be memory-mapped on read.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional: without it we always rebuild
+    feather = None
+
+# Bump this whenever the merge logic in DataLoader changes the output frame.
+SNAPSHOT_FORMAT_VERSION = 2
+
+MANIFEST_NAME = "manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SnapshotStore:
+    """Reads and writes the companies snapshot for a given set of source files."""
+
+    def __init__(self, directory: Path, enabled: bool = True):
+        self.directory = Path(directory)
+        self.enabled = enabled and feather is not None
+        if enabled and feather is None:
+            print("Warning: pyarrow not installed, data snapshots are disabled")
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def fingerprint(self, sources: dict, extra: dict = None) -> dict:
+        """
+        Describe every source file (size, mtime, sha256) and derive the snapshot key.
+        Hashes are reused from the previous manifest when size and mtime are unchanged.
+        """
+        previous = self._read_manifest().get("files", {})
+        files = {}
+        for label, path in sorted(sources.items()):
+            path = Path(path)
+            if not path.exists():
+                files[label] = {"path": str(path), "missing": True}
+                continue
+            stat = path.stat()
+            entry = {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            old = previous.get(label, {})
+            if all(old.get(k) == entry[k] for k in ("path", "size", "mtime_ns")) and old.get("sha256"):
+                entry["sha256"] = old["sha256"]
+            else:
+                entry["sha256"] = _sha256(path)
+            files[label] = entry
+
+        key_material = {
+            "version": SNAPSHOT_FORMAT_VERSION,
+            "files": {label: f.get("sha256", "missing") for label, f in files.items()},
+            "extra": extra or {},
+        }
+        key = hashlib.sha256(json.dumps(key_material, sort_keys=True).encode("utf-8")).hexdigest()
+        return {"key": key, "files": files}
+
+    def read(self, fingerprint: dict):
+        """Return the cached DataFrame for this fingerprint, or None on a miss."""
+        if not self.enabled:
+            return None
+        manifest = self._read_manifest()
+        if manifest.get("key") != fingerprint["key"]:
+            return None
+        snapshot_path = self.directory / manifest.get("snapshot", "")
+        if not snapshot_path.is_file():
+            return None
+        try:
+            table = feather.read_table(snapshot_path, memory_map=True)
+            df = table.to_pandas()
+            # All-NA placeholder columns come back as None; restore the pd.NA the loader set
+            for field in table.schema:
+                if str(field.type) == "null":
+                    df[field.name] = pd.NA
+            return df
+        except Exception as e:
+            print(f"Warning: could not read snapshot {snapshot_path}: {e}")
+            return None
+
+    def write(self, df, fingerprint: dict):
+        """Persist the DataFrame and its manifest atomically, dropping older snapshots."""
+        if not self.enabled or df is None or df.empty:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            snapshot_name = f"companies-{fingerprint['key'][:16]}.arrow"
+            snapshot_path = self.directory / snapshot_name
+            tmp_path = snapshot_path.with_suffix(".arrow.tmp")
+            feather.write_feather(df, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, snapshot_path)
+
+            manifest = {
+                "key": fingerprint["key"],
+                "version": SNAPSHOT_FORMAT_VERSION,
+                "snapshot": snapshot_name,
+                "created_at": datetime.utcnow().isoformat(),
+                "rows": len(df),
+                "files": fingerprint["files"],
+            }
+            tmp_manifest = self.manifest_path.with_suffix(".json.tmp")
+            with open(tmp_manifest, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_manifest, self.manifest_path)
+
+            for old in self.directory.glob("companies-*.arrow"):
+                if old.name != snapshot_name:
+                    old.unlink(missing_ok=True)
+            print(f"  -> Snapshot written to {snapshot_path}")
+        except Exception as e:
+            print(f"Warning: could not write snapshot: {e}")
@@ -0,0 +1,393 @@
+"""
+Bulk import of the Trovit charikat CSV into enriched_companies.
+
+The existing company_id -> row map is loaded in one query and diffed against
+the CSV in memory; writes go out as batched SQLite
+`INSERT ... ON CONFLICT(company_id) DO UPDATE` statements inside a single
+transaction, instead of one SELECT + ORM flush per CSV row.
+
+On conflict only the Trovit-owned fields are rewritten (name, wilaya, the
+`rne` section of `data`, enriched_by / enriched_at): metrics, JORT and
+marchés sections and notes are preserved, like the former row-by-row import.
+
+Imports are incremental: each row stores the sha256 of its source record
+(`source_hash`) and rows whose record did not change are not rewritten, so
+`enriched_at` keeps meaning "last changed". The run prints which fields
+changed. With --checkpoint, the file is committed in chunks and a checkpoint
+records how far the run got, so an interrupted import of a huge file can be
+resumed with --resume.
+
+After the last chunk, every imported row is matched against the watchlist in
+one pass (see watchlist_detection.py), in the same transaction.
+
+Usage (from backend/):
+    python -m app.services.trovit_import [--csv PATH] [--batch-size N]
+        [--checkpoint PATH [--checkpoint-every N] [--resume]] [--report PATH]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.database import engine
+from app.migrations import run_migrations
+from app.models.enrichment_models import EnrichedCompany
+from app.services.normalization import name_skeleton, normalize_name
+from app.services.watchlist_detection import detect_watchlist
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+CSV_FILE = os.path.join(BACKEND_DIR, "trovit_charikat_ahliya_all.csv")
+
+IMPORT_BATCH_SIZE = int(os.getenv("TROVIT_IMPORT_BATCH_SIZE", 500))
+CHECKPOINT_EVERY = int(os.getenv("TROVIT_IMPORT_CHECKPOINT_EVERY", 5000))
+# company_ids per existing-rows lookup (SQLite bound-parameter limit)
+LOOKUP_BATCH_SIZE = 500
+REQUIRED_COLUMNS = ("charika_id", "name", "wilaya")
+ENRICHED_BY_TAG = "trovit_csv"
+
+DEFAULT_METRICS = {
+    "total_contracts": 0,
+    "total_contracts_value": 0,
+    "capital_to_contracts_ratio": 0,
+    "red_flags": [],
+}
+
+
+def _clean(row: dict, key: str):
+    return (row.get(key) or "").strip() or None
+
+
+def parse_rne(row: dict) -> dict:
+    """Build the `data["rne"]` section (RneData shape) from one CSV row."""
+    capital_str = (row.get("capital") or "").strip()
+    capital_int = int(capital_str) if capital_str and capital_str.isdigit() else None
+
+    return {
+        # Trovit fields
+        "charika_type": _clean(row, "charika_type"),
+        "charika_id": row.get("charika_id"),
+        "name": _clean(row, "name"),
+        "delegation": _clean(row, "delegation"),
+        "zipcode_list": _clean(row, "zipcode_list"),
+        "start_date_raw": _clean(row, "start_date_raw"),
+        "capital": capital_int,
+        "tax_id": _clean(row, "tax_id"),
+        "rc_number": _clean(row, "rc_number"),
+        "founding_date_iso": _clean(row, "founding_date_iso"),
+        "legal_form": _clean(row, "legal_form"),
+        "address": _clean(row, "address"),
+        "zipcode_detail": _clean(row, "zipcode_detail"),
+        "wilaya": _clean(row, "wilaya"),
+        "founding_location": _clean(row, "founding_location"),
+        "detail_url": _clean(row, "detail_url"),
+
+        # Legacy/Standard fields mapping
+        "capital_social": float(capital_int) if capital_int else 0.0,
+        # Fallback for registration number: RC or Tax ID or empty
+        "registration_number": _clean(row, "rc_number") or _clean(row, "tax_id") or "",
+        "registration_date": _clean(row, "founding_date_iso") or "",
+        "shareholders": [],  # Can't extract from this CSV
+    }
+
+
+def read_csv(path: str):
+    """CSV rows keyed by charika_id (last occurrence wins) and the number of rows skipped."""
+    csv.field_size_limit(sys.maxsize)
+    rows = {}
+    skipped = 0
+    with open(path, mode="r", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [col for col in REQUIRED_COLUMNS if col not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Missing required columns in CSV: {missing}. Found: {reader.fieldnames}")
+        for row in reader:
+            company_id = row.get("charika_id")
+            if not company_id:
+                skipped += 1
+                continue
+            rows[company_id] = row
+    return rows, skipped
+
+
+def load_existing(conn, company_ids: list) -> dict:
+    """company_id -> (company_name, wilaya, data, enriched_by, source_hash) for those already enriched."""
+    table = EnrichedCompany.__table__
+    existing = {}
+    for start in range(0, len(company_ids), LOOKUP_BATCH_SIZE):
+        result = conn.execute(
+            select(table.c.company_id, table.c.company_name, table.c.wilaya,
+                   table.c.data, table.c.enriched_by, table.c.source_hash)
+            .where(table.c.company_id.in_(company_ids[start:start + LOOKUP_BATCH_SIZE]))
+        )
+        existing.update((r.company_id, r) for r in result)
+    return existing
+
+
+def content_hash(company_name, wilaya, rne: dict) -> str:
+    """Stable hash of the Trovit-owned content of a row."""
+    payload = json.dumps([company_name, wilaya, rne], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def changed_fields(current, company_name, wilaya, rne: dict) -> list:
+    """Names of the Trovit-owned fields that differ from the stored row."""
+    fields = []
+    if current.company_name != company_name:
+        fields.append("company_name")
+    if current.wilaya != wilaya:
+        fields.append("wilaya")
+    old_rne = (current.data or {}).get("rne") or {}
+    fields += [f"rne.{key}" for key in sorted(set(old_rne) | set(rne)) if old_rne.get(key) != rne.get(key)]
+    return fields
+
+
+def _enriched_by(current) -> str:
+    if not current:
+        return ENRICHED_BY_TAG
+    if ENRICHED_BY_TAG not in current:
+        return f"{current}, {ENRICHED_BY_TAG}"
+    return current
+
+
+class ImportPlan:
+    """Rows to insert, rows to update, and unchanged rows whose hash is only being recorded."""
+
+    def __init__(self):
+        self.new = []
+        self.updated = []
+        self.hash_only = []
+        self.unchanged = 0
+        self.field_changes = Counter()
+        self.changes = {}
+
+
+def name_keys(company_name) -> dict:
+    """Derived name columns (Core inserts bypass the model validators)."""
+    return {"name_normalized": normalize_name(company_name), "name_skeleton": name_skeleton(company_name)}
+
+
+def plan_upserts(rows, existing: dict, now: datetime) -> ImportPlan:
+    """Diff (company_id, row) pairs against the existing map and keep only what changed."""
+    plan = ImportPlan()
+    for company_id, row in rows:
+        rne = parse_rne(row)
+        current = existing.get(company_id)
+        if current is None:
+            company_name = row.get("name", "Unknown")
+            wilaya = row.get("wilaya", "Unknown")
+            plan.new.append({
+                "company_id": company_id,
+                "company_name": company_name,
+                **name_keys(company_name),
+                "wilaya": wilaya,
+                "data": {
+                    "rne": rne,
+                    "jort": {"announcements": []},
+                    "marches": {"contracts": []},
+                    "notes": "",
+                },
+                "metrics": DEFAULT_METRICS,
+                "red_flag_count": 0,
+                "has_red_flags": False,
+                "source_hash": content_hash(company_name, wilaya, rne),
+                "enriched_by": ENRICHED_BY_TAG,
+                "enriched_at": now,
+            })
+            continue
+
+        company_name = row.get("name") or current.company_name
+        wilaya = row.get("wilaya") or current.wilaya
+        new_hash = content_hash(company_name, wilaya, rne)
+        if current.source_hash == new_hash:
+            plan.unchanged += 1
+            continue
+        if current.source_hash is None:
+            # Imported before hashes were stored: compare against the stored content
+            stored = (current.data or {}).get("rne")
+            if stored is not None and content_hash(current.company_name, current.wilaya, stored) == new_hash:
+                plan.unchanged += 1
+                plan.hash_only.append({"key": company_id, "source_hash": new_hash})
+                continue
+
+        fields = changed_fields(current, company_name, wilaya, rne)
+        plan.field_changes.update(fields)
+        plan.changes[company_id] = fields
+
+        # Update the RNE section only, preserving JORT/Marches sections and metrics
+        data = dict(current.data or {})
+        data["rne"] = rne
+        data.setdefault("jort", {"announcements": []})
+        data.setdefault("marches", {"contracts": []})
+        data.setdefault("notes", "")
+        plan.updated.append({
+            "company_id": company_id,
+            "company_name": company_name,
+            **name_keys(company_name),
+            "wilaya": wilaya,
+            "data": data,
+            # Only used if the row disappeared since load_existing(); never overwrites
+            "metrics": DEFAULT_METRICS,
+            "red_flag_count": 0,
+            "has_red_flags": False,
+            "source_hash": new_hash,
+            "enriched_by": _enriched_by(current.enriched_by),
+            "enriched_at": now,
+        })
+    return plan
+
+
+UPSERT_COLUMNS = ("company_name", "name_normalized", "name_skeleton", "wilaya", "data", "source_hash",
+                  "enriched_by", "enriched_at")
+
+
+def write_upserts(conn, values: list, batch_size: int = IMPORT_BATCH_SIZE):
+    """INSERT ... ON CONFLICT DO UPDATE in batches of `batch_size` rows."""
+    table = EnrichedCompany.__table__
+    for start in range(0, len(values), batch_size):
+        stmt = sqlite_insert(table).values(values[start:start + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.company_id],
+            set_={col: stmt.excluded[col] for col in UPSERT_COLUMNS},
+        )
+        conn.execute(stmt)
+        print(f"Written {min(start + batch_size, len(values))}/{len(values)} rows...")
+
+
+def write_hashes(conn, values: list):
+    """Record the hash of unchanged rows imported before hashes existed (no other column touched)."""
+    if not values:
+        return
+    table = EnrichedCompany.__table__
+    conn.execute(
+        table.update().where(table.c.company_id == bindparam("key")).values(source_hash=bindparam("source_hash")),
+        values,
+    )
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_checkpoint(path: str, csv_hash: str) -> int:
+    """Number of CSV rows already imported, if the checkpoint belongs to this exact file."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if checkpoint.get("csv_sha256") != csv_hash:
+        print("Checkpoint is for a different CSV file, starting from the beginning")
+        return 0
+    return int(checkpoint.get("position", 0))
+
+
+def write_checkpoint(path: str, csv_hash: str, position: int, total: int):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"csv_sha256": csv_hash, "position": position, "total": total,
+                   "updated_at": datetime.utcnow().isoformat()}, f)
+    os.replace(tmp, path)
+
+
+def run(csv_path: str = CSV_FILE, batch_size: int = IMPORT_BATCH_SIZE, checkpoint: str = None,
+        checkpoint_every: int = CHECKPOINT_EVERY, resume: bool = False, report: str = None) -> dict:
+    """
+    Import the CSV and return a summary of the run. Without a checkpoint the
+    whole import is one transaction; with one, every `checkpoint_every` rows
+    are committed and recorded so that `resume=True` continues from there.
+    """
+    print("Starting Trovit CSV Import...")
+    # The upserts write the derived columns added by the migrations
+    run_migrations(engine)
+    print(f"Reading CSV from: {csv_path}")
+    rows, skipped = read_csv(csv_path)
+    items = list(rows.items())
+    now = datetime.utcnow()
+
+    csv_hash = file_sha256(csv_path) if checkpoint else None
+    start = read_checkpoint(checkpoint, csv_hash) if checkpoint and resume else 0
+    if start:
+        print(f"Resuming after {start}/{len(items)} rows")
+    chunk_size = checkpoint_every if checkpoint else max(len(items), 1)
+
+    totals = Counter()
+    field_changes = Counter()
+    changes = {}
+    position = start
+    while True:
+        chunk = items[position:position + chunk_size]
+        last_chunk = position + len(chunk) >= len(items)
+        with engine.begin() as conn:
+            # Only this chunk's rows: the cost of a run stays proportional to the CSV, not the table
+            existing = load_existing(conn, [company_id for company_id, _ in chunk])
+            plan = plan_upserts(chunk, existing, now)
+            write_upserts(conn, plan.new + plan.updated, batch_size)
+            write_hashes(conn, plan.hash_only)
+            if last_chunk:
+                # Whole file, not just this chunk: a watched company may match any imported row
+                totals["watchlist_detected"] += detect_watchlist(conn, items, now)
+        totals.update(created=len(plan.new), updated=len(plan.updated), unchanged=plan.unchanged)
+        field_changes.update(plan.field_changes)
+        changes.update(plan.changes)
+        position += len(chunk)
+        if checkpoint:
+            write_checkpoint(checkpoint, csv_hash, position, len(items))
+        if last_chunk:
+            break
+
+    summary = {
+        "created": totals["created"],
+        "updated": totals["updated"],
+        "unchanged": totals["unchanged"],
+        "skipped": skipped,
+        "watchlist_detected": totals["watchlist_detected"],
+        "changed_fields": dict(field_changes.most_common()),
+    }
+    print("Import complete!")
+    print(f"Created: {summary['created']}")
+    print(f"Updated: {summary['updated']}")
+    print(f"Unchanged: {summary['unchanged']}")
+    print(f"Skipped: {summary['skipped']}")
+    for field, count in field_changes.most_common():
+        print(f"  {field}: {count} changed")
+
+    if report:
+        with open(report, "w", encoding="utf-8") as f:
+            json.dump({**summary, "changes": changes}, f, ensure_ascii=False, indent=2)
+        print(f"Change report written to {report}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import of the Trovit charikat CSV")
+    parser.add_argument("--csv", default=CSV_FILE, help="CSV path (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE,
+                        help="rows per INSERT ... ON CONFLICT statement (default: %(default)s)")
+    parser.add_argument("--checkpoint", help="commit in chunks and record progress in this file")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                        help="CSV rows per committed chunk with --checkpoint (default: %(default)s)")
+    parser.add_argument("--resume", action="store_true", help="continue from the --checkpoint file")
+    parser.add_argument("--report", help="write the per-company changed fields to this JSON file")
+    args = parser.parse_args()
+    if not os.path.exists(args.csv):
+        print(f"Error: CSV file not found at {args.csv}")
+        return
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    run(args.csv, args.batch_size, args.checkpoint, args.checkpoint_every, args.resume, args.report)
+
+
+if __name__ == "__main__":
+    main()
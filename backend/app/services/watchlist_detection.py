@@ -0,0 +1,124 @@
+"""
+Set-based watchlist detection: which watched companies now appear in Trovit.
+
+All WatchCompany rows still in the `watch` state are loaded once and indexed
+two ways, per wilaya key (normalized, spaces removed):
+- an exact hash index on the normalized name (generic tokens stripped),
+- a token index (normalized name tokens) and the stored `name_skeleton`
+  blocking key pulling fuzzy candidates, scored with rapidfuzz
+  token_sort_ratio against a strict cutoff.
+A whole imported batch is matched in one pass and every state transition is
+written with a single executemany UPDATE on the caller's transaction.
+"""
+
+import os
+from datetime import datetime
+
+from rapidfuzz import fuzz, process
+from sqlalchemy import bindparam, select
+
+from app.models.enrichment_models import WatchCompany
+from app.services.normalization import compact_key, name_skeleton, normalize_name
+
+# Same level as MATCH_THRESHOLD ("match strict") in the fuzzy comparison scripts
+WATCHLIST_FUZZY_THRESHOLD = float(os.getenv("WATCHLIST_FUZZY_THRESHOLD", 95))
+
+
+def match_key(value) -> str:
+    return normalize_name(value, strip_generic=True)
+
+
+def _tokens(key: str) -> set:
+    return set(key.split())
+
+
+class WatchlistMatcher:
+    """Exact and fuzzy indexes over watched companies, blocked by wilaya."""
+
+    def __init__(self, watched, threshold: float = WATCHLIST_FUZZY_THRESHOLD):
+        self.threshold = threshold
+        self._names = {}
+        self._exact = {}
+        self._tokens = {}
+        self._skeletons = {}
+        for entry in watched:
+            name, wilaya = match_key(entry.name_ar), compact_key(entry.wilaya)
+            if not name:
+                continue
+            self._names[entry.id] = name
+            self._exact.setdefault((wilaya, name), []).append(entry.id)
+            by_token = self._tokens.setdefault(wilaya, {})
+            for token in _tokens(name):
+                by_token.setdefault(token, set()).add(entry.id)
+            skeleton = entry.name_skeleton or name_skeleton(entry.name_ar)
+            if skeleton:
+                self._skeletons.setdefault((wilaya, skeleton), set()).add(entry.id)
+
+    def __len__(self):
+        return len(self._names)
+
+    def match(self, name, wilaya) -> list:
+        """(watch id, score) pairs for one Trovit company; exact matches score 100."""
+        skeleton = name_skeleton(name)
+        name, wilaya = match_key(name), compact_key(wilaya)
+        if not name:
+            return []
+        exact = self._exact.get((wilaya, name))
+        if exact:
+            return [(watch_id, 100.0) for watch_id in exact]
+
+        by_token = self._tokens.get(wilaya, {})
+        candidates = set(self._skeletons.get((wilaya, skeleton), ()))
+        for token in _tokens(name):
+            candidates |= by_token.get(token, set())
+        if not candidates:
+            return []
+        ids = list(candidates)
+        return [
+            (ids[pos], score)
+            for _, score, pos in process.extract(
+                name, [self._names[i] for i in ids], scorer=fuzz.token_sort_ratio,
+                score_cutoff=self.threshold, limit=None,
+            )
+        ]
+
+
+def detect_watchlist(conn, rows, now: datetime) -> int:
+    """
+    Match every imported (company_id, CSV row) pair against the `watch` entries
+    and flag the detected ones as `detected_trovit`. Each watched company keeps
+    its best-scoring Trovit match. Returns the number of entries flagged.
+    """
+    table = WatchCompany.__table__
+    watched = conn.execute(
+        select(table.c.id, table.c.name_ar, table.c.wilaya, table.c.name_skeleton).where(table.c.etat_enregistrement == "watch")
+    ).all()
+    matcher = WatchlistMatcher(watched)
+    if not len(matcher):
+        return 0
+
+    best = {}
+    for company_id, row in rows:
+        for watch_id, score in matcher.match(row.get("name"), row.get("wilaya")):
+            if watch_id not in best or score > best[watch_id][0]:
+                best[watch_id] = (score, company_id, row)
+
+    if not best:
+        return 0
+    for watch_id, (score, company_id, row) in best.items():
+        print(f"[Watchlist] Detected company: {row.get('name')} ({row.get('wilaya')}), score {score:.0f}")
+
+    conn.execute(
+        table.update().where(table.c.id == bindparam("watch_id")).values(
+            etat_enregistrement="detected_trovit",
+            detected_trovit_at=now,
+            detected_trovit_charika_id=bindparam("charika_id"),
+            detected_trovit_url=bindparam("url"),
+            updated_at=now,
+        ),
+        [
+            {"watch_id": watch_id, "charika_id": company_id, "url": row.get("detail_url")}
+            for watch_id, (score, company_id, row) in best.items()
+        ],
+    )
+    return len(best)
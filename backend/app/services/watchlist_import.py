@@ -0,0 +1,94 @@
+"""
+Import of the Ahlya companies missing from Trovit (output of
+ahlya_vs_trovit_fuzzy.py) into the watch_companies table.
+
+Stored values are cleaned with clean_text; duplicates (same name and wilaya)
+are detected on the shared normalized keys, loaded once for the whole table,
+so 'الشركة الأهلية' and 'الشركة الاهلية' are the same watched company.
+
+Usage (from backend/):
+    python -m app.services.watchlist_import [--csv PATH]
+"""
+
+import argparse
+import csv
+import os
+import uuid
+from datetime import datetime
+
+from app.database import SessionLocal, engine
+from app.models.enrichment_models import WatchCompany
+from app.services.normalization import clean_text, compact_key, normalize_name
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+CSV_FILE = os.path.join(BACKEND_DIR, "ahlya_not_in_trovit_fuzzy.csv")
+
+
+def watch_key(name_ar, wilaya) -> tuple:
+    return normalize_name(name_ar), compact_key(wilaya)
+
+
+def run(csv_path: str = CSV_FILE) -> dict:
+    print("=== Importing Watchlist from Ahlya CSV ===")
+    db = SessionLocal()
+    try:
+        # Create table if not exists (lazy init for script)
+        WatchCompany.__table__.create(bind=engine, checkfirst=True)
+
+        known = {watch_key(name, wilaya) for name, wilaya in db.query(WatchCompany.name_ar, WatchCompany.wilaya)}
+        count_new = 0
+        count_skip = 0
+        now = datetime.utcnow()
+
+        with open(csv_path, mode="r", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                name_ar = clean_text(row.get("name_ar") or row.get("اسم_الشركة"))
+                wilaya = clean_text(row.get("wilaya") or row.get("الولاية"))
+                if not name_ar:
+                    continue
+
+                # Uniqueness on normalized (Name + Wilaya)
+                key = watch_key(name_ar, wilaya)
+                if key in known:
+                    count_skip += 1
+                    continue
+                known.add(key)
+
+                db.add(WatchCompany(
+                    id=str(uuid.uuid4()),
+                    name_ar=name_ar,
+                    wilaya=wilaya,
+                    delegation=clean_text(row.get("delegation") or row.get("المعتمدية")),
+                    activity=clean_text(row.get("activity") or row.get("الموضوع / النشاط")),
+                    type=clean_text(row.get("type") or row.get("النوع")),
+                    date_annonce=clean_text(row.get("date_annonce") or row.get("تاريخ الإعلان") or row.get("date")),
+                    etat_enregistrement="watch",
+                    created_at=now,
+                    updated_at=now,
+                ))
+                count_new += 1
+
+        db.commit()
+        print("Import finished.")
+        print(f"New companies added to watchlist: {count_new}")
+        print(f"Skipped (already exists): {count_skip}")
+        return {"created": count_new, "skipped": count_skip}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the Ahlya companies missing from Trovit into the watchlist")
+    parser.add_argument("--csv", default=CSV_FILE, help="CSV path (default: %(default)s)")
+    args = parser.parse_args()
+    if not os.path.exists(args.csv):
+        print(f"Error: File not found: {args.csv}")
+        return
+    run(args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-wilaya row and value counts of the companies DataFrame, computed at load time.
+
+The stats and risk endpoints are pure functions of the loaded data: instead of
+re-filtering `df[df['wilaya'] == wilaya]` and re-counting on every request,
+DataLoader counts each wilaya once. Only the counts are kept: the rows
+themselves stay in companies_df, not in a second copy sliced per wilaya.
+"""
+
+from itertools import islice
+
+import pandas as pd
+
+# Columns whose value counts are served by /stats
+COUNTED_COLUMNS = ("activity_group", "activity_normalized", "type")
+
+
+def safe_value_counts(df, col, head=None):
+    """Safely get value_counts for a column, returning {} if column doesn't exist."""
+    if col not in df.columns:
+        return {}
+    vc = df[col].dropna().value_counts()
+    if head:
+        vc = vc.head(head)
+    return vc.to_dict()
+
+
+def _head(counts: dict, head=None) -> dict:
+    if not head:
+        return dict(counts)
+    return dict(islice(counts.items(), head))
+
+
+class WilayaPartitions:
+    """Row counts and value counts of companies_df per wilaya and nationally."""
+
+    def __init__(self, df=None):
+        df = df if df is not None else pd.DataFrame()
+        self._sizes = {}
+        self._counts = {}
+        self._national_counts = {}
+
+        if df.empty:
+            return
+
+        self._national_counts = {col: safe_value_counts(df, col) for col in COUNTED_COLUMNS}
+
+        if "wilaya" not in df.columns:
+            return
+        # sort=False keeps wilayas in order of first appearance, like df['wilaya'].unique()
+        for wilaya, frame in df.groupby("wilaya", sort=False):
+            self._sizes[wilaya] = len(frame)
+            self._counts[wilaya] = {col: safe_value_counts(frame, col) for col in COUNTED_COLUMNS}
+
+    @property
+    def wilayas(self) -> list:
+        return list(self._sizes)
+
+    def size(self, wilaya: str) -> int:
+        return self._sizes.get(wilaya, 0)
+
+    def value_counts(self, wilaya: str, col: str, head=None) -> dict:
+        return _head(self._counts.get(wilaya, {}).get(col, {}), head)
+
+    def national_value_counts(self, col: str, head=None) -> dict:
+        return _head(self._national_counts.get(col, {}), head)
@@ -0,0 +1,85 @@
+# benchmark_fuzzy.py
+# Compare la boucle process.extractOne (ancienne version des scripts fuzzy)
+# et le moteur app/services/fuzzy_matcher.py (cdist, avec et sans blocage par
+# wilaya) sur des listes synthétiques de noms, et vérifie que les résultats
+# non bloqués sont identiques à extractOne.
+#
+# Usage : python benchmark_fuzzy.py [taille_A] [taille_B]
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from app.services.fuzzy_matcher import best_matches, block_key
+
+# ------------- CONFIG --------------
+
+CSV_TROVIT = Path("trovit_charikat_ahliya_all.csv")
+
+DEFAULT_SIZE_A = 5_000
+DEFAULT_SIZE_B = 20_000
+# La boucle extractOne est mesurée sur un échantillon puis extrapolée
+LOOP_SAMPLE = 300
+SEED = 42
+
+WILAYAS = ["تونس", "اريانة", "بن عروس", "صفاقس", "سوسة", "نابل", "القيروان", "قفصة", "زغوان", "سيدي بوزيد"]
+WORDS = ["الفلاحية", "للخدمات", "البيئية", "النموذجية", "للتنمية", "الواحات", "الزيتون", "النسيج", "الحرفية", "الصيد"]
+
+# -----------------------------------
+
+
+def seed_names() -> list:
+    if CSV_TROVIT.exists():
+        names = pd.read_csv(CSV_TROVIT, encoding="utf-8-sig")["name"].dropna().tolist()
+        if names:
+            return names
+    return ["الشركة الأهلية المحلية " + w for w in WORDS]
+
+
+def build_side(size: int, rng: random.Random, seeds: list):
+    names, wilayas = [], []
+    for _ in range(size):
+        words = rng.choice(seeds).split() + rng.sample(WORDS, 2)
+        rng.shuffle(words)
+        names.append(" ".join(words))
+        wilayas.append(block_key(rng.choice(WILAYAS)))
+    return names, wilayas
+
+
+def main():
+    size_a = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE_A
+    size_b = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SIZE_B
+    rng = random.Random(SEED)
+    seeds = seed_names()
+    names_a, wilayas_a = build_side(size_a, rng, seeds)
+    names_b, wilayas_b = build_side(size_b, rng, seeds)
+    print(f"[INFO] A : {size_a} noms, B : {size_b} noms, {len(WILAYAS)} wilayas")
+
+    sample = names_a[:LOOP_SAMPLE]
+    start = time.perf_counter()
+    expected = [process.extractOne(n, names_b, scorer=fuzz.token_sort_ratio) for n in sample]
+    t_loop = (time.perf_counter() - start) * size_a / len(sample)
+
+    start = time.perf_counter()
+    scores, idx = best_matches(names_a, names_b)
+    t_cdist = time.perf_counter() - start
+
+    start = time.perf_counter()
+    best_matches(names_a, names_b, wilayas_a, wilayas_b)
+    t_blocked = time.perf_counter() - start
+
+    diff = sum(1 for k, m in enumerate(expected) if m[1] != scores[k] or m[2] != idx[k])
+    if diff:
+        raise AssertionError(f"{diff} résultats différents entre extractOne et cdist")
+
+    print(f"[INFO] Boucle extractOne (extrapolée)  : {t_loop:.2f}s")
+    print(f"[INFO] cdist sans blocage              : {t_cdist:.2f}s (x{t_loop / t_cdist:.1f})")
+    print(f"[INFO] cdist bloqué par wilaya         : {t_blocked:.2f}s (x{t_loop / t_blocked:.1f})")
+    print(f"[OK] Résultats non bloqués identiques à extractOne sur {len(sample)} lignes")
+
+
+if __name__ == "__main__":
+    main()
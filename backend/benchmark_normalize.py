@@ -0,0 +1,75 @@
+# benchmark_normalize.py
+# Compare normalize_company_name (Series.apply) et normalize_company_names (batch)
+# sur un volume synthétique de noms, et vérifie que les sorties sont identiques.
+#
+# Usage : python benchmark_normalize.py [nombre_de_noms]
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from app.services.data_loader import normalize_company_name, normalize_company_names
+
+# ------------- CONFIG --------------
+
+CSV_AHLYA = Path("Ahlya_Total_Feuil1.csv")
+CSV_TROVIT = Path("trovit_charikat_ahliya_all.csv")
+
+DEFAULT_SIZE = 200_000
+SEED = 42
+
+# Variantes ajoutées aux noms réels pour couvrir diacritiques, accents et espaces
+SUFFIXES = ["", " ", "  للخدمات", " مُحَمَّد", " Société Générale", "\tÉLECTRICITÉ ", " ـــ "]
+
+# -----------------------------------
+
+
+def load_seed_names() -> list:
+    names = []
+    if CSV_AHLYA.exists():
+        names += pd.read_csv(CSV_AHLYA, encoding="utf-8-sig")["اسم_الشركة"].dropna().tolist()
+    if CSV_TROVIT.exists():
+        names += pd.read_csv(CSV_TROVIT, encoding="utf-8-sig")["name"].dropna().tolist()
+    if not names:
+        names = ["الشركة الأهلية المحلية النموذجية", "Société Citoyenne Régionale"]
+    return names
+
+
+def build_sample(size: int) -> pd.Series:
+    rng = random.Random(SEED)
+    seeds = load_seed_names()
+    values = []
+    for i in range(size):
+        if i % 97 == 0:
+            values.append(None)
+            continue
+        values.append(f"{rng.choice(seeds)}{rng.choice(SUFFIXES)} {rng.randint(1, size // 4)}")
+    return pd.Series(values, dtype=object)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    names = build_sample(size)
+    print(f"[INFO] Noms à normaliser : {len(names)} ({names.nunique()} distincts)")
+
+    start = time.perf_counter()
+    expected = names.apply(normalize_company_name)
+    t_apply = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = normalize_company_names(names)
+    t_batch = time.perf_counter() - start
+
+    if not expected.equals(result):
+        diff = (expected != result).sum()
+        raise AssertionError(f"{diff} sorties différentes entre apply et batch")
+
+    print(f"[INFO] Series.apply(normalize_company_name) : {t_apply:.3f}s")
+    print(f"[INFO] normalize_company_names(Series)      : {t_batch:.3f}s")
+    print(f"[OK] Sorties identiques, accélération x{t_apply / t_batch:.1f}")
+
+
+if __name__ == "__main__":
+    main()
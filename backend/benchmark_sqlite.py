@@ -0,0 +1,130 @@
+# benchmark_sqlite.py
+# Lectures concurrentes pendant une importation : compare le moteur SQLite par
+# défaut (journal "rollback", sans busy_timeout) et le moteur réglé de
+# app/database.py (WAL, synchronous=NORMAL, busy_timeout, cache, mmap).
+#
+# Chaque moteur travaille sur une copie temporaire de la base : un thread
+# "import" réécrit les entreprises par lots (une transaction par lot) pendant
+# que plusieurs threads lecteurs exécutent la requête de /enrichment/list.
+#
+# Usage : python benchmark_sqlite.py [durée_s] [lecteurs]
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import DATABASE_PATH, Base, create_sqlite_engine
+from app.migrations import run_migrations
+
+# ------------- CONFIG --------------
+
+DEFAULT_DURATION = 5.0
+DEFAULT_READERS = 4
+WRITE_BATCH = 50
+# Taille du texte réécrit dans `data` par ligne (un import réécrit des JSON volumineux)
+WRITE_PAYLOAD = 20_000
+# Statements par transaction d'import, et temps de préparation Python entre deux
+WRITE_STATEMENTS = 5
+WRITE_PAUSE = 0.01
+
+READ_SQL = text(
+    "SELECT company_id, company_name, wilaya, json_extract(data, '$.rne.capital_social') "
+    "FROM enriched_companies WHERE has_red_flags = 0 ORDER BY enriched_at DESC LIMIT 12"
+)
+WRITE_SQL = text(
+    "UPDATE enriched_companies SET data = json_set(data, '$.notes', :notes), enriched_at = CURRENT_TIMESTAMP "
+    "WHERE company_id IN (SELECT company_id FROM enriched_companies ORDER BY random() LIMIT :n)"
+)
+
+# -----------------------------------
+
+
+def run(engine, duration: float, readers: int) -> dict:
+    stop = threading.Event()
+    latencies, errors = [], {"read": 0, "write": 0}
+    commits = [0]
+    lock = threading.Lock()
+
+    def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(READ_SQL).all()
+            except OperationalError:
+                with lock:
+                    errors["read"] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    def writer():
+        while not stop.is_set():
+            try:
+                with engine.begin() as conn:
+                    for _ in range(WRITE_STATEMENTS):
+                        conn.execute(WRITE_SQL, {"notes": f"{time.time()} " + "x" * WRITE_PAYLOAD, "n": WRITE_BATCH})
+                        time.sleep(WRITE_PAUSE)
+                commits[0] += 1
+            except OperationalError:
+                errors["write"] += 1
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    return {
+        "reads": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+        "max_ms": latencies[-1] * 1000 if latencies else 0,
+        "commits": commits[0],
+        "errors": errors,
+    }
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DURATION
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_READERS
+    print(f"[INFO] Base : {DATABASE_PATH}")
+    print(f"[INFO] {duration:.0f}s, 1 thread d'import ({WRITE_STATEMENTS} x {WRITE_BATCH} lignes par transaction), "
+          f"{readers} lecteurs")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engines = {}
+        for label in ("defaut", "wal"):
+            path = os.path.join(tmp, f"{label}.db")
+            shutil.copyfile(DATABASE_PATH, path)
+            if label == "defaut":
+                # Réglages d'origine : journal rollback, timeout sqlite3 de 5 s
+                engines[label] = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+                with engines[label].begin() as conn:
+                    conn.exec_driver_sql("PRAGMA journal_mode = DELETE")
+            else:
+                engines[label] = create_sqlite_engine(path)
+            Base.metadata.create_all(bind=engines[label])
+            run_migrations(engines[label])
+
+        for label, engine in engines.items():
+            res = run(engine, duration, readers)
+            engine.dispose()
+            print(
+                f"[INFO] {label:7s}: {res['reads']:6d} lectures, p50 {res['p50_ms']:.2f} ms, "
+                f"p99 {res['p99_ms']:.2f} ms, max {res['max_ms']:.1f} ms | {res['commits']} lots écrits | "
+                f"erreurs lecture {res['errors']['read']}, écriture {res['errors']['write']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
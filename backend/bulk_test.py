@@ -1,6 +1,5 @@
 import requests
 import json
-import time
 import pandas as pd
 from datetime import datetime
 
@@ -8,7 +7,8 @@ from datetime import datetime
 BASE_URL = "https://ba7ath-api.onrender.com/api/v1" # Remplace par ton URL locale pour tester vite
 TOKEN = "TON_JWT_TOKEN_ICI"
 COMPANY_IDS = ["id_1", "id_2", "id_3"] # Liste d'IDs à tester
-DELAY_BETWEEN_REQUESTS = 5  # Secondes (pour éviter l'erreur 429 de Gemini)
+WILAYA = None  # Ou une wilaya (ex. "القيروان") pour analyser toutes ses entreprises enrichies
+CONCURRENCY = 4  # Le débit vers Gemini (429) est géré côté serveur : token bucket + réessais
 
 HEADERS = {
     "Authorization": f"Bearer {TOKEN}",
@@ -17,37 +17,40 @@ HEADERS = {
 
 def run_bulk_test():
     results = []
-    print(f"🚀 Démarrage du test massif : {len(COMPANY_IDS)} entreprises à analyser.\n")
+    print(f"🚀 Démarrage du test massif : {len(COMPANY_IDS)} entreprises à analyser"
+          f"{f' + wilaya {WILAYA}' if WILAYA else ''}.\n")
 
-    for c_id in COMPANY_IDS:
-        print(f"🔍 Analyse de l'ID : {c_id}...", end="", flush=True)
-        
-        try:
-            start_time = time.time()
-            response = requests.post(f"{BASE_URL}/investigate/{c_id}", headers=HEADERS)
-            duration = round(time.time() - start_time, 2)
-
-            if response.status_code == 200:
-                data = response.json()
-                analysis = data.get("analysis", {})
-                
+    payload = {"company_ids": COMPANY_IDS, "wilaya": WILAYA, "concurrency": CONCURRENCY}
+    # Les résultats arrivent en flux NDJSON, dans l'ordre où les analyses se terminent
+    with requests.post(f"{BASE_URL}/investigate/batch", headers=HEADERS, json=payload, stream=True) as response:
+        if response.status_code != 200:
+            print(f"❌ Erreur {response.status_code} : {response.text}")
+            return
+        for raw in response.iter_lines():
+            if not raw:
+                continue
+            line = json.loads(raw)
+            if line["type"] == "start":
+                print(f"⏳ {line['total']} entreprises, {line['concurrency']} en parallèle")
+            elif line["type"] == "summary":
+                print(f"\n🏁 {line['succeeded']} OK, {line['failed']} en échec, {line['elapsed_s']}s")
+            elif line["ok"]:
+                analysis = line["result"].get("analysis", {})
                 results.append({
-                    "ID": c_id,
+                    "ID": line["company_id"],
                     "Status": analysis.get("status"),
                     "Score": analysis.get("match_score"),
                     "Summary": analysis.get("summary_ar"),
-                    "Duration": f"{duration}s"
+                    "Duration": f"{line['elapsed_ms'] / 1000:.2f}s"
                 })
-                print(" ✅ OK")
+                print(f"🔍 {line['company_id']} ✅ OK")
             else:
-                print(f" ❌ Erreur {response.status_code}")
-                results.append({"ID": c_id, "Status": "ERROR", "Summary": response.text})
-
-        except Exception as e:
-            print(f" ❌ Crash : {str(e)}")
+                error = line.get("error") or (line.get("result") or {}).get("error")
+                print(f"🔍 {line['company_id']} ❌ Erreur {line.get('http_status', '')} {error}")
+                results.append({"ID": line["company_id"], "Status": "ERROR", "Summary": str(error)})
 
-        # Respect du quota Gemini Flash (15 RPM)
-        time.sleep(DELAY_BETWEEN_REQUESTS)
+    if not results:
+        return
 
     # --- GÉNÉRATION DU RAPPORT ---
     df = pd.DataFrame(results)
@@ -1,6 +1,8 @@
 import pandas as pd
 from pathlib import Path
-from rapidfuzz import process, fuzz
+
+from app.services.fuzzy_matcher import join_context, match_frames
+from app.services.normalization import normalize_names
 
 # ------------- CONFIG À ADAPTER --------------
 
@@ -21,6 +23,11 @@ COL_NAME_B = "name"        # ex : nom Trovit en arabe
 CTX_COLS_A = ["wilaya", "delegation"]   # adapte à ton fichier
 CTX_COLS_B = ["wilaya", "delegation"]   # idem
 
+# Blocage : ne comparer que les lignes de la même wilaya (None pour désactiver).
+# Les lignes sans candidat >= LOW_MATCH dans leur bloc sont recherchées dans tout B.
+BLOCK_COL_A = "wilaya"
+BLOCK_COL_B = "wilaya"
+
 # Seuils fuzzy
 # score >= HIGH_MATCH  -> match sûr
 # LOW_MATCH <= score < HIGH_MATCH -> match douteux (à vérifier à la main / par LLM)
@@ -40,32 +47,6 @@ ENC_B = "utf-8-sig"
 # ------------- FONCTIONS ---------------------
 
 
-def normalize_name(s: str) -> str:
-    """Nettoyage léger pour comparer les noms."""
-    if pd.isna(s):
-        return ""
-    s = str(s).strip()
-
-    # mettre en minuscules pour la partie latine
-    s = s.lower()
-
-    # enlever quelques termes génériques FR/AR
-    generic_fr = [
-        "societe", "société", "ste", "sa", "sarl",
-        "société anonyme", "société à responsabilité limitée",
-    ]
-    generic_ar = [
-        "شركة", "الشركة", "الاهلية", "الأهلية", "الجهوية",
-        "المحلية", "شركة أهلية", "شركة الاهلية", "شركة الأهلية",
-    ]
-    for g in generic_fr + generic_ar:
-        s = s.replace(g, "")
-
-    # normaliser les espaces
-    s = " ".join(s.split())
-    return s
-
-
 def load_csv(path: Path, name_col: str, ctx_cols: list, enc: str) -> pd.DataFrame:
     if not path.exists():
         raise FileNotFoundError(path.resolve())
@@ -74,7 +55,9 @@ def load_csv(path: Path, name_col: str, ctx_cols: list, enc: str) -> pd.DataFram
         raise KeyError(f"Colonne '{name_col}' absente dans {path.name}.\n"
                        f"Colonnes dispo : {list(df.columns)}")
     df["__name_raw__"] = df[name_col]
-    df["__name_norm__"] = df[name_col].apply(normalize_name)
+    # Normalisation commune (app/services/normalization.py) : lettres arabes
+    # unifiées, accents et mots génériques FR/AR supprimés
+    df["__name_norm__"] = normalize_names(df[name_col], strip_generic=True)
 
     # garder nom + colonnes utiles pour l'analyse
     keep_cols = ["__name_raw__", "__name_norm__"]
@@ -92,49 +75,25 @@ def main():
     print(f"[INFO] Lignes fichier A : {len(df_a)}")
     print(f"[INFO] Lignes fichier B : {len(df_b)}")
 
-    # 2. Préparer une série de noms B pour RapidFuzz
-    names_b = df_b["__name_norm__"].tolist()
-
-    best_matches = []
-    for idx, row in df_a.iterrows():
-        name_a_norm = row["__name_norm__"]
-
-        if not name_a_norm:
-            best_matches.append({"score": 0, "b_index": None})
-            continue
-
-        # RapidFuzz: extractOne(label, choices, scorer=...)
-        match = process.extractOne(
-            name_a_norm,
-            names_b,
-            scorer=fuzz.token_sort_ratio,
-        )
-        if match is None:
-            best_matches.append({"score": 0, "b_index": None})
-        else:
-            label_b, score, b_idx = match
-            best_matches.append({"score": score, "b_index": b_idx})
-
-    # 3. Construire un DataFrame résultat
-    res = df_a.copy()
-    res["match_score"] = [m["score"] for m in best_matches]
-    res["b_index"] = [m["b_index"] for m in best_matches]
-
-    # joindre les infos du fichier B
-    res["name_b_raw"] = res["b_index"].apply(
-        lambda i: df_b.loc[i, "__name_raw__"] if pd.notna(i) else None
-    )
-    res["name_b_norm"] = res["b_index"].apply(
-        lambda i: df_b.loc[i, "__name_norm__"] if pd.notna(i) else None
+    # 2. Meilleur match dans B pour chaque ligne de A (cdist RapidFuzz par bloc)
+    blocked = BLOCK_COL_A in df_a.columns and BLOCK_COL_B in df_b.columns
+    res = match_frames(
+        df_a,
+        df_b,
+        "__name_norm__",
+        "__name_norm__",
+        normalize=lambda names: names,
+        block_a=BLOCK_COL_A if blocked else None,
+        block_b=BLOCK_COL_B if blocked else None,
+        fallback_below=LOW_MATCH,
     )
 
-    # Ajout du contexte B (wilaya, delegation, etc.)
-    for c in CTX_COLS_B:
-        if c in df_b.columns:
-            col_b = f"{c}_b"
-            res[col_b] = res["b_index"].apply(
-                lambda i: df_b.loc[i, c] if pd.notna(i) else None
-            )
+    # 3. Joindre les infos du fichier B (nom brut, normalisé, contexte)
+    b_index = res["b_index"].fillna(-1).astype(int)
+    names_b = join_context(res, df_b, b_index, ["__name_raw__", "__name_norm__"])
+    res["name_b_raw"] = names_b["__name_raw__"]
+    res["name_b_norm"] = names_b["__name_norm__"]
+    res = pd.concat([res, join_context(res, df_b, b_index, CTX_COLS_B, suffix="_b")], axis=1)
 
     # 4. Séparer en 3 catégories
     matches_surs = res[res["match_score"] >= HIGH_MATCH].copy()
@@ -2,6 +2,8 @@
 import pandas as pd
 from pathlib import Path
 
+from app.services.normalization import normalize_names
+
 # Fichiers d'entrée
 CSV_NOT_IN = Path("not_in_trovit_qwen.csv")
 CSV_AHLYA  = Path("Ahlya_Total_Feuil1.csv")
@@ -27,14 +29,9 @@ def main():
     if col_nom_ahlya not in df_ah.columns:
         raise KeyError(f"'{col_nom_ahlya}' manquant dans {CSV_AHLYA.name} ; colonnes = {list(df_ah.columns)}")
 
-    # 3. Normalisation légère des noms des deux côtés
-    def norm(s):
-        if pd.isna(s):
-            return ""
-        return str(s).strip()
-
-    df_not["__key__"] = df_not["name_ar"].apply(norm)
-    df_ah["__key__"]  = df_ah[col_nom_ahlya].apply(norm)
+    # 3. Normalisation des noms des deux côtés (même clé que le chargeur de données)
+    df_not["__key__"] = normalize_names(df_not["name_ar"])
+    df_ah["__key__"]  = normalize_names(df_ah[col_nom_ahlya])
 
     # 4. Colonnes à ramener depuis Ahlya
     cols_details = [
@@ -22,12 +22,13 @@ const MetricPill = ({ label, value, color = 'blue' }) => (
 
 const CompanyCard = ({ company, onViewProfile }) => {
     const { company_name, wilaya, enriched_at, metrics, data } = company;
-    const redFlagCount = metrics?.red_flags?.length || 0;
-    const contractsCount = data?.marches?.contracts?.length || 0;
-    const capital = data?.rne?.capital_social || 0;
+    // /enrichment/list renvoie des compteurs sans le blob `data` ; repli sur `data` sinon
+    const redFlagCount = company.red_flag_count ?? metrics?.red_flags?.length ?? 0;
+    const contractsCount = company.contracts_count ?? data?.marches?.contracts?.length ?? 0;
+    const capital = company.capital_social ?? data?.rne?.capital_social ?? 0;
     
     // NOUVEAU : Récupération du nombre d'annonces JORT
-    const jortCount = data?.jort?.announcements?.length || 0;
+    const jortCount = company.jort_count ?? data?.jort?.announcements?.length ?? 0;
 
     return (
         <div className="bg-white rounded-xl shadow-md border border-gray-100 overflow-hidden hover:shadow-lg transition-shadow">